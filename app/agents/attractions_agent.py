@@ -2,8 +2,9 @@ from crewai import Agent
 from app.tools.attractions_tools import search_attractions
 from langchain_groq import ChatGroq
 import os
+from typing import Optional
 
-def create_attractions_agent():
+def create_attractions_agent(max_iter: int = 15, max_execution_time: Optional[int] = None):
     """Creates a specialized attractions and activities agent using Groq LLM"""
     
     llm = ChatGroq(
@@ -25,5 +26,7 @@ def create_attractions_agent():
         tools=[search_attractions],
         verbose=True,
         llm=llm,
-        allow_delegation=False
+        allow_delegation=False,
+        max_iter=max_iter,
+        max_execution_time=max_execution_time
     )
\ No newline at end of file
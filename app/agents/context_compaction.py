@@ -0,0 +1,153 @@
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# Rough token estimate used for the savings log (~4 characters per token)
+CHARS_PER_TOKEN = 4
+
+_JSON_START = re.compile(r"[\[{]")
+_ARRIVAL_TIME = re.compile(r"\barriv\w*(?:(?!depart)[^\d\n]){0,30}(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2})?)", re.IGNORECASE)
+_PRICE = re.compile(r"\$\s?(\d+(?:,\d{3})*(?:\.\d+)?)")
+
+def _json_values(text: str) -> List[Any]:
+    """Decodes every JSON object or array embedded in an agent's free-text output"""
+    decoder = json.JSONDecoder()
+    values = []
+    index = 0
+    while index < len(text):
+        match = _JSON_START.search(text, index)
+        if match is None:
+            break
+        try:
+            value, end = decoder.raw_decode(text, match.start())
+            values.append(value)
+            index = end
+        except ValueError:
+            index = match.start() + 1
+    return values
+
+def _walk_dicts(value: Any) -> Iterator[dict]:
+    if isinstance(value, dict):
+        yield value
+        for child in value.values():
+            yield from _walk_dicts(child)
+    elif isinstance(value, list):
+        for child in value:
+            yield from _walk_dicts(child)
+
+def _as_float(value: Any):
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = re.search(r"-?\d+(?:,\d{3})*(?:\.\d+)?", value)
+        if match:
+            return float(match.group(0).replace(",", ""))
+    return None
+
+# Lists an agent puts its chosen flights under, as opposed to raw tool results it echoes
+_RECOMMENDATION_FIELDS = ("recommended_flights", "recommendations")
+
+def _flight_summary(item: dict) -> dict:
+    return {
+        "airline": item.get("airline"),
+        "flight_number": item.get("flight_number"),
+        "arrival_time": item.get("arrival_time"),
+        "price": _as_float(item.get("price"))
+    }
+
+def compact_flight_output(raw_output: str) -> dict:
+    """Keeps only what the hotel agent needs from the flight search: arrival times and prices"""
+    values = _json_values(raw_output)
+
+    # Prefer the agent's recommendation; the tool's full flight list may be echoed before it
+    flights = [
+        _flight_summary(flight)
+        for value in values
+        for item in _walk_dicts(value)
+        for field in _RECOMMENDATION_FIELDS
+        if isinstance(item.get(field), list)
+        for flight in _walk_dicts(item[field])
+        if "arrival_time" in flight
+    ]
+    if not flights:
+        flights = [
+            _flight_summary(item)
+            for value in values
+            for item in _walk_dicts(value)
+            if "arrival_time" in item
+        ]
+
+    if not flights:
+        # Only timestamps labelled as arrivals count; a bare timestamp may well be a departure
+        for line in raw_output.splitlines():
+            arrival = _ARRIVAL_TIME.search(line)
+            if arrival:
+                price = _PRICE.search(line)
+                flights.append({
+                    "arrival_time": arrival.group(1),
+                    "price": _as_float(price.group(1)) if price else None
+                })
+
+    # The flight agent is asked for its top 2 options
+    return {"recommended_flights": flights[:2]} if flights else {}
+
+def compact_weather_output(raw_output: str) -> dict:
+    """Keeps only what the attractions agent needs from the forecast: condition and precipitation chance"""
+    handoff = {}
+    for value in _json_values(raw_output):
+        for item in _walk_dicts(value):
+            if "condition" in item and "condition" not in handoff:
+                handoff["condition"] = item["condition"]
+            if "precipitation_chance" in item and "precipitation_chance" not in handoff:
+                handoff["precipitation_chance"] = _as_float(item["precipitation_chance"])
+            if "prefer_indoor" in item and "prefer_indoor" not in handoff:
+                handoff["prefer_indoor"] = bool(item["prefer_indoor"])
+
+    if "precipitation_chance" not in handoff:
+        match = re.search(r"precipitation[^0-9]{0,40}(\d+(?:\.\d+)?)\s*(%?)", raw_output, re.IGNORECASE)
+        if match:
+            chance = float(match.group(1))
+            handoff["precipitation_chance"] = chance / 100 if match.group(2) or chance > 1 else chance
+
+    if "condition" not in handoff:
+        match = re.search(r"\b(sunny|clear|cloudy|overcast|rain\w*|showers|snow\w*|storm\w*|cold|hot|humid|mild)\b", raw_output, re.IGNORECASE)
+        if match:
+            handoff["condition"] = match.group(1).lower()
+
+    return handoff
+
+COMPACTORS: Dict[str, Callable[[str], dict]] = {
+    "flight": compact_flight_output,
+    "weather": compact_weather_output,
+}
+
+def compact_handoff(task_name: str, raw_output: str, consumers: List[str]) -> str:
+    """
+    Reduces a task's output to the structured fields its downstream tasks use.
+
+    Falls back to the full output when nothing could be extracted, so a dependent
+    agent never loses context it would otherwise have had.
+    """
+    compactor = COMPACTORS.get(task_name)
+    if compactor is None or not raw_output:
+        return raw_output
+
+    handoff = compactor(raw_output)
+    if not handoff:
+        logger.info(f"Context edge {task_name} -> {', '.join(consumers)}: nothing extracted, passing full output")
+        return raw_output
+
+    compacted = f"{task_name.capitalize()} summary: {json.dumps(handoff)}"
+    before = len(raw_output.encode("utf-8"))
+    after = len(compacted.encode("utf-8"))
+    if after >= before:
+        return raw_output
+
+    logger.info(
+        f"Context edge {task_name} -> {', '.join(consumers)}: {before}B -> {after}B, "
+        f"saved {before - after}B (~{(before - after) // CHARS_PER_TOKEN} tokens)"
+    )
+    return compacted
@@ -1,9 +1,10 @@
 from crewai import Agent
-from app.tools.flight_tools import search_flights
+from app.tools.flight_tools import search_flexible_flights, search_flights
 from langchain_groq import ChatGroq
 import os
+from typing import Optional
 
-def create_flight_agent():
+def create_flight_agent(max_iter: int = 15, max_execution_time: Optional[int] = None):
     """Creates a specialized flight search agent using Groq LLM"""
     
     llm = ChatGroq(
@@ -20,8 +21,10 @@ def create_flight_agent():
         layover strategies, and how arrival times impact the overall travel experience. 
         You always consider factors like jet lag, connection times, and arrival convenience 
         when making recommendations. You prioritize value over just finding the cheapest option.""",
-        tools=[search_flights],
+        tools=[search_flights, search_flexible_flights],
         verbose=True,
         llm=llm,
-        allow_delegation=False
+        allow_delegation=False,
+        max_iter=max_iter,
+        max_execution_time=max_execution_time
     )
\ No newline at end of file
@@ -2,8 +2,9 @@ from crewai import Agent
 from app.tools.hotel_tools import search_hotels
 from langchain_groq import ChatGroq
 import os
+from typing import Optional
 
-def create_hotel_agent():
+def create_hotel_agent(max_iter: int = 15, max_execution_time: Optional[int] = None):
     """Creates a specialized hotel search agent using Groq LLM"""
     
     llm = ChatGroq(
@@ -24,5 +25,7 @@ def create_hotel_agent():
         tools=[search_hotels],
         verbose=True,
         llm=llm,
-        allow_delegation=False
+        allow_delegation=False,
+        max_iter=max_iter,
+        max_execution_time=max_execution_time
     )
\ No newline at end of file
@@ -1,67 +1,256 @@
 from crewai import Crew, Task, Process
+from crewai.tasks.task_output import TaskOutput
 from app.agents.flight_agent import create_flight_agent
 from app.agents.hotel_agent import create_hotel_agent
 from app.agents.weather_agent import create_weather_agent
 from app.agents.attractions_agent import create_attractions_agent
+from app.agents.context_compaction import compact_handoff
+from app.cache import make_key
+from app.destinations import canonical_destination_id
+from datetime import date
+from typing import Callable, Dict, List, Optional
+import math
 
-def create_travel_planning_crew(destination: str, start_date: str, end_date: str, budget: float, preferences: list):
+# Tasks in execution order
+TASK_ORDER = ["flight", "weather", "hotel", "attractions"]
+
+# Inputs each task's prompt is built from. A task only needs to re-run when one of
+# these, or the output of a task it receives as context, changes.
+TASK_INPUTS = {
+    "flight": ["destination", "start_date", "end_date", "flight_budget", "date_flexibility_days"],
+    "weather": ["destination", "start_date", "end_date"],
+    "hotel": ["destination", "start_date", "end_date", "hotel_budget_per_night", "preferences"],
+    "attractions": ["destination", "activities_budget", "preferences"],
+}
+
+TASK_CONTEXT = {
+    "flight": [],
+    "weather": [],
+    "hotel": ["flight"],
+    "attractions": ["weather"],
+}
+
+# Tasks that receive each task's output as context
+TASK_CONSUMERS = {
+    name: [consumer for consumer in TASK_ORDER if name in TASK_CONTEXT[consumer]]
+    for name in TASK_ORDER
+}
+
+# Agent iterations each task typically takes: one per tool call plus the final answer.
+# At the default 2.5 seconds per iteration the 11 iterations fit in the 30 second deadline.
+TASK_ITERATIONS = {
+    "flight": 3,
+    "weather": 2,
+    "hotel": 3,
+    "attractions": 3,
+}
+
+# Share of the plan deadline each task gets when it has to run
+TASK_TIME_WEIGHTS = {
+    name: iterations / sum(TASK_ITERATIONS.values())
+    for name, iterations in TASK_ITERATIONS.items()
+}
+
+# Fewest iterations a tool-using agent can finish in: one tool call and the final answer.
+# A flexible-date flight search calls search_flexible_flights and then search_flights.
+MIN_TASK_ITERATIONS = 2
+MIN_FLEX_FLIGHT_ITERATIONS = 3
+
+# Final answer LangChain's agent executor returns when it stops an agent at max_iter or max_execution_time
+AGENT_STOPPED_MARKER = "Agent stopped due to iteration limit or time limit"
+
+def split_task_budgets(
+    tasks: List[str],
+    seconds: float,
+    seconds_per_iteration: float,
+    date_flexibility_days: int = 0
+) -> Dict[str, dict]:
+    """
+    Splits the time left before the deadline across the tasks that will run, by weight.
+
+    No agent is given fewer iterations than it needs to call its tools and answer,
+    even if that overruns its share; the plan deadline still cuts off whatever is late.
+    """
+    total_weight = sum(TASK_TIME_WEIGHTS[name] for name in tasks) or 1
+    budgets = {}
+    for name in tasks:
+        min_iter = MIN_TASK_ITERATIONS
+        if name == "flight" and date_flexibility_days:
+            min_iter = MIN_FLEX_FLIGHT_ITERATIONS
+        task_seconds = max(0.0, seconds * TASK_TIME_WEIGHTS[name] / total_weight)
+        max_iter = max(min_iter, int(task_seconds // seconds_per_iteration))
+        budgets[name] = {
+            "seconds": round(max(task_seconds, max_iter * seconds_per_iteration), 2),
+            "max_iter": max_iter
+        }
+    return budgets
+
+def is_stopped_output(raw_output: str) -> bool:
+    return AGENT_STOPPED_MARKER in (raw_output or "")
+
+def build_task_inputs(
+    destination: str,
+    start_date: str,
+    end_date: str,
+    budget: float,
+    preferences: list,
+    date_flexibility_days: int = 0
+) -> dict:
+    """Resolves the request into the exact values that end up in the task prompts"""
+    nights = (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days
+
+    # Calculate budget allocations (this is a simple heuristic)
+    return {
+        "destination": destination,
+        "start_date": start_date,
+        "end_date": end_date,
+        "flight_budget": round(budget * 0.4, 2),
+        "hotel_budget_per_night": round((budget * 0.35) / max(1, nights), 2),
+        "activities_budget": round(budget * 0.25, 2),
+        "preferences": ", ".join(preferences) if preferences else "general sightseeing",
+        "date_flexibility_days": date_flexibility_days,
+    }
+
+def task_output_keys(inputs: dict, provided_outputs: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Computes a cache key per task from its own inputs and the keys of its context tasks,
+    so a change to any input invalidates exactly the tasks that depend on it.
+
+    Tasks in provided_outputs are keyed by that output instead, since it was not
+    produced from the task's inputs.
+    """
+    provided_outputs = provided_outputs or {}
+    inputs = {**inputs, "destination": canonical_destination_id(inputs["destination"])}
+    keys = {}
+    for name in TASK_ORDER:
+        if name in provided_outputs:
+            keys[name] = make_key("task", name, provided=provided_outputs[name])
+            continue
+        keys[name] = make_key(
+            "task",
+            name,
+            inputs={field: inputs[field] for field in TASK_INPUTS[name]},
+            context=[keys[upstream] for upstream in TASK_CONTEXT[name]]
+        )
+    return keys
+
+def create_travel_planning_crew(
+    destination: str,
+    start_date: str,
+    end_date: str,
+    budget: float,
+    preferences: list,
+    date_flexibility_days: int = 0,
+    reuse_outputs: Optional[Dict[str, str]] = None,
+    on_task_output: Optional[Callable[[str, str], None]] = None,
+    task_budgets: Optional[Dict[str, dict]] = None
+):
     """
     Creates a crew of specialized agents that work together to plan a complete trip.
-    
+
     This demonstrates Agent-to-Agent collaboration where each agent's output
     becomes context for subsequent agents, enabling intelligent coordination.
+
+    Tasks listed in reuse_outputs are not run again: their stored output is handed
+    to dependent tasks as context instead. on_task_output is called with the task
+    name and full raw output whenever a task finishes.
+
+    Outputs that feed a context edge are compacted to the fields the consuming task
+    needs before it runs, so downstream prompts don't grow with upstream verbosity.
+
+    task_budgets (from split_task_budgets) caps each agent's wall-clock time and
+    reasoning iterations; an agent over budget is stopped with a partial answer.
     """
-    
-    # Create all specialized agents
-    flight_agent = create_flight_agent()
-    hotel_agent = create_hotel_agent()
-    weather_agent = create_weather_agent()
-    attractions_agent = create_attractions_agent()
-    
-    # Calculate budget allocations (this is a simple heuristic)
-    flight_budget = budget * 0.4
-    hotel_budget_per_night = (budget * 0.35) / max(1, (end_date - start_date).days)
-    activities_budget = budget * 0.25
-    
-    preferences_str = ", ".join(preferences) if preferences else "general sightseeing"
-    
+    reuse_outputs = reuse_outputs or {}
+    task_budgets = task_budgets or {}
+    inputs = build_task_inputs(destination, start_date, end_date, budget, preferences, date_flexibility_days)
+
+    flight_budget = inputs["flight_budget"]
+    hotel_budget_per_night = inputs["hotel_budget_per_night"]
+    activities_budget = inputs["activities_budget"]
+    preferences_str = inputs["preferences"]
+
+    if date_flexibility_days:
+        flight_search_step = (
+            f"Dates are flexible by +/- {date_flexibility_days} days: call search_flexible_flights once "
+            f"with flex_days={date_flexibility_days} to find the cheapest dates, then search_flights for those dates"
+        )
+    else:
+        flight_search_step = "Search for available flights using the search_flights tool"
+
+    # Only create agents for the tasks that actually need to run
+    agent_factories = {
+        "flight": create_flight_agent,
+        "weather": create_weather_agent,
+        "hotel": create_hotel_agent,
+        "attractions": create_attractions_agent,
+    }
+    agents = {}
+    for name, factory in agent_factories.items():
+        if name in reuse_outputs:
+            continue
+        budget = task_budgets.get(name)
+        if budget is None:
+            agents[name] = factory()
+        else:
+            agents[name] = factory(
+                max_iter=budget["max_iter"],
+                max_execution_time=max(1, math.ceil(budget["seconds"]))
+            )
+
+    def task_callback(name: str):
+        consumers = TASK_CONSUMERS[name]
+        if on_task_output is None and not consumers:
+            return None
+
+        def callback(output):
+            if on_task_output is not None:
+                on_task_output(name, output.raw_output)
+            # Dependent tasks read output.raw_output as their context
+            if consumers:
+                output.raw_output = compact_handoff(name, output.raw_output, consumers)
+
+        return callback
+
     # Task 1: Flight Search
     # This agent runs first and its output is passed to subsequent agents
     flight_task = Task(
         description=f"""
         Find the best flight options to {destination} for travel from {start_date} to {end_date}.
         Maximum flight budget: ${flight_budget:.2f}
-        
+
         Requirements:
-        1. Search for available flights using the search_flights tool
+        1. {flight_search_step}
         2. Analyze options considering price, convenience, and arrival time
         3. Pay special attention to arrival times as they affect hotel check-in
         4. Recommend your top 2 flight options with clear reasoning
-        
+
         Output your recommendations as structured JSON with flight details and reasoning.
         """,
         expected_output="JSON with recommended flights including arrival times and analysis",
-        agent=flight_agent
+        agent=agents.get("flight"),
+        callback=task_callback("flight")
     )
-    
+
     # Task 2: Weather Forecast
     # Runs in parallel with flights, informs packing and activities
     weather_task = Task(
         description=f"""
         Get weather forecast for {destination} during the travel period {start_date} to {end_date}.
-        
+
         Requirements:
         1. Use the weather forecast tool to get conditions
         2. Provide temperature ranges and precipitation probability
         3. Give specific packing recommendations
         4. Suggest whether indoor or outdoor activities are preferable
-        
+
         Output weather information as structured JSON with actionable recommendations.
         """,
         expected_output="JSON with weather forecast and packing recommendations",
-        agent=weather_agent
+        agent=agents.get("weather"),
+        callback=task_callback("weather")
     )
-    
+
     # Task 3: Hotel Search
     # This agent receives flight information as context and adjusts recommendations accordingly
     hotel_task = Task(
@@ -70,24 +259,25 @@ def create_travel_planning_crew(destination: str, start_date: str, end_date: str
         Maximum budget per night: ${hotel_budget_per_night:.2f}
         Travel dates: {start_date} to {end_date}
         Traveler preferences: {preferences_str}
-        
-        IMPORTANT: Review the flight arrival time from the previous task. If the arrival is:
+
+        IMPORTANT: Review the flight arrival time in the flight summary from the previous task. If the arrival is:
         - Before 3 PM: Suggest hotels with early check-in or negotiate arrival details
         - After 10 PM: Note that late check-in should be confirmed
-        
+
         Requirements:
         1. Use search_hotels tool with appropriate check-in/check-out dates
         2. Consider the flight arrival time for check-in recommendations
         3. Match hotel location to preferences (museums, food districts, etc.)
         4. Provide 2-3 hotel options with reasoning
-        
+
         Output recommendations as structured JSON with hotel details and reasoning.
         """,
         expected_output="JSON with hotel recommendations coordinated with flight arrival",
-        agent=hotel_agent,
-        context=[flight_task]  # This task receives flight_task output as context
+        agent=agents.get("hotel"),
+        context=[flight_task],  # This task receives flight_task output as context
+        callback=task_callback("hotel")
     )
-    
+
     # Task 4: Attractions and Activities
     # This agent receives both weather and preferences to curate activities
     attractions_task = Task(
@@ -95,32 +285,46 @@ def create_travel_planning_crew(destination: str, start_date: str, end_date: str
         Curate a personalized list of attractions and activities in {destination}.
         Remaining budget for activities: ${activities_budget:.2f}
         Traveler preferences: {preferences_str}
-        
-        IMPORTANT: Review the weather forecast from the previous task.
+
+        IMPORTANT: Review the weather summary (condition and precipitation chance) from the previous task.
         - If rainy or cold weather is expected, prioritize indoor attractions
         - If weather is good, include outdoor experiences
-        
+
         Requirements:
         1. Use search_attractions tool with preferences and weather info
         2. Create a balanced mix of activities matching preferences
         3. Consider weather conditions for indoor/outdoor recommendations
         4. Ensure total cost fits within activities budget
         5. Provide 4-6 curated recommendations with time estimates
-        
+
         Output as structured JSON with attraction details and reasoning.
         """,
         expected_output="JSON with curated attractions adapted to weather and preferences",
-        agent=attractions_agent,
-        context=[weather_task]  # This task receives weather_task output as context
+        agent=agents.get("attractions"),
+        context=[weather_task],  # This task receives weather_task output as context
+        callback=task_callback("attractions")
     )
-    
+
+    tasks = {
+        "flight": flight_task,
+        "weather": weather_task,
+        "hotel": hotel_task,
+        "attractions": attractions_task,
+    }
+
+    # Reused tasks keep their stored output so dependent tasks still receive it as context
+    for name, raw_output in reuse_outputs.items():
+        if TASK_CONSUMERS[name]:
+            raw_output = compact_handoff(name, raw_output, TASK_CONSUMERS[name])
+        tasks[name].output = TaskOutput(description=tasks[name].description, raw_output=raw_output)
+
     # Create the crew with sequential process
     # This ensures tasks execute in order with context passing
     crew = Crew(
-        agents=[flight_agent, weather_agent, hotel_agent, attractions_agent],
-        tasks=[flight_task, weather_task, hotel_task, attractions_task],
+        agents=[agents[name] for name in TASK_ORDER if name in agents],
+        tasks=[tasks[name] for name in TASK_ORDER if name not in reuse_outputs],
         process=Process.sequential,  # Tasks run in order, passing context
         verbose=True
     )
-    
-    return crew
\ No newline at end of file
+
+    return crew
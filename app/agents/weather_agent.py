@@ -2,8 +2,9 @@ from crewai import Agent
 from app.tools.weather_tools import get_weather_forecast
 from langchain_groq import ChatGroq
 import os
+from typing import Optional
 
-def create_weather_agent():
+def create_weather_agent(max_iter: int = 15, max_execution_time: Optional[int] = None):
     """Creates a specialized weather analysis agent using Groq LLM"""
     
     llm = ChatGroq(
@@ -24,5 +25,7 @@ def create_weather_agent():
         tools=[get_weather_forecast],
         verbose=True,
         llm=llm,
-        allow_delegation=False
+        allow_delegation=False,
+        max_iter=max_iter,
+        max_execution_time=max_execution_time
     )
\ No newline at end of file
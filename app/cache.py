@@ -0,0 +1,275 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from app.config import get_settings
+from app.destinations import canonical_destination_id
+
+_MISSING = object()
+
+
+def make_key(namespace: str, *parts: Any, **fields: Any) -> str:
+    """Builds a stable cache key from a namespace and JSON-serialisable inputs"""
+    payload = json.dumps([parts, fields], sort_keys=True, default=str)
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+    return f"{namespace}:{digest}"
+
+
+class SharedCache:
+    """
+    Key/value cache backed by a SQLite database in WAL mode.
+
+    Every uvicorn/gunicorn worker on the host opens the same file, so an entry
+    computed by one worker is a hit for all the others. get_or_compute() takes a
+    short-lived lease on the key so concurrent misses compute the value only once.
+    Expired entries are purged by set() at most once every purge_interval seconds.
+    """
+
+    def __init__(self, path: str, default_ttl: int = 3600, lease_seconds: int = 120, purge_interval: float = 300):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.lease_seconds = lease_seconds
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS leases (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS stats (
+                namespace TEXT PRIMARY KEY,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT NOT NULL,
+                field TEXT NOT NULL,
+                value REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (name, field)
+            );
+        """)
+
+    def _lookup(self, key: str) -> Any:
+        row = self._connect().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+        return _MISSING if row is None else json.loads(row[0])
+
+    def _record(self, key: str, hit: bool):
+        namespace = key.split(":", 1)[0]
+        column = "hits" if hit else "misses"
+        self._connect().execute(
+            f"INSERT INTO stats (namespace, {column}) VALUES (?, 1) "
+            f"ON CONFLICT(namespace) DO UPDATE SET {column} = {column} + 1",
+            (namespace,)
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._lookup(key)
+        self._record(key, hit=value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def peek(self, key: str, default: Any = None) -> Any:
+        """Like get(), but not counted in the hit/miss stats; for bookkeeping reads"""
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def entries(self, prefix: str) -> dict:
+        """Every unexpired entry whose key starts with prefix"""
+        rows = self._connect().execute(
+            "SELECT key, value FROM entries WHERE key LIKE ? AND expires_at > ?",
+            (prefix + "%", time.time())
+        ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, default=str), now + (ttl if ttl is not None else self.default_ttl))
+        )
+        if now >= self._next_purge:
+            # Expired rows are never read again, but without this the database grows forever
+            self._next_purge = now + self.purge_interval
+            self.purge_expired()
+
+    def delete(self, key: str):
+        self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def acquire_lease(self, key: str, owner: str, seconds: Optional[float] = None) -> bool:
+        """
+        Takes the lease on key for owner, or extends it if owner already holds it.
+        Returns False while another owner holds an unexpired lease.
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = conn.execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at WHERE owner = excluded.owner",
+                (key, owner, now + (seconds if seconds is not None else self.lease_seconds))
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def release_lease(self, key: str, owner: str):
+        self._connect().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[int] = None,
+        poll_interval: float = 0.2,
+        should_store: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Returns the cached value for key, computing and storing it on a miss.
+
+        Only the worker holding the lease runs compute(); the others wait for
+        its result, or take over the lease if the holder dies and it expires.
+        A computed value that fails should_store is returned but never written,
+        so waiting workers compute their own instead of receiving it.
+        """
+        value = self._lookup(key)
+        if value is not _MISSING:
+            self._record(key, hit=True)
+            return value
+
+        owner = uuid.uuid4().hex
+        while True:
+            if self.acquire_lease(key, owner):
+                try:
+                    value = self._lookup(key)
+                    if value is _MISSING:
+                        self._record(key, hit=False)
+                        value = compute()
+                        if should_store is None or should_store(value):
+                            self.set(key, value, ttl)
+                    else:
+                        self._record(key, hit=True)
+                    return value
+                finally:
+                    self.release_lease(key, owner)
+
+            time.sleep(poll_interval)
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self._record(key, hit=True)
+                return value
+
+    def stats(self) -> dict:
+        rows = self._connect().execute("SELECT namespace, hits, misses FROM stats").fetchall()
+        result = {}
+        for namespace, hits, misses in rows:
+            total = hits + misses
+            result[namespace] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0
+            }
+        return result
+
+    def increment(self, name: str, field: str, amount: float = 1):
+        """Adds amount to a named counter shared by all workers"""
+        self._connect().execute(
+            "INSERT INTO counters (name, field, value) VALUES (?, ?, ?) "
+            "ON CONFLICT(name, field) DO UPDATE SET value = value + excluded.value",
+            (name, field, amount)
+        )
+
+    def counters(self, prefix: str = "") -> dict:
+        rows = self._connect().execute(
+            "SELECT name, field, value FROM counters WHERE name LIKE ?",
+            (prefix + "%",)
+        ).fetchall()
+        result = {}
+        for name, field, value in rows:
+            result.setdefault(name, {})[field] = value
+        return result
+
+    def purge_expired(self) -> int:
+        """Deletes expired entries and abandoned leases, returning the number of entries removed"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+        return conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,)).rowcount
+
+
+@lru_cache()
+def get_cache() -> SharedCache:
+    settings = get_settings()
+    return SharedCache(
+        settings.cache_path,
+        default_ttl=settings.plan_cache_ttl_seconds,
+        lease_seconds=settings.cache_lease_seconds,
+        purge_interval=settings.cache_purge_interval_seconds
+    )
+
+
+def cached_tool(namespace: str):
+    """
+    Caches a tool function's JSON result in the shared cache.
+
+    Apply it underneath @tool so CrewAI still sees the original signature and docstring.
+    Destination and origin arguments are keyed by their canonical city ID, so
+    "Paris, France" and "paris" share an entry.
+    """
+    def decorator(func: Callable[..., str]) -> Callable[..., str]:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            for field in ("destination", "origin"):
+                if arguments.get(field):
+                    arguments[field] = canonical_destination_id(arguments[field])
+            key = make_key(namespace, **arguments)
+            return get_cache().get_or_compute(
+                key,
+                lambda: func(*bound.args, **bound.kwargs),
+                ttl=get_settings().tool_cache_ttl_seconds
+            )
+
+        return wrapper
+
+    return decorator
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     groq_api_key: str
@@ -7,14 +8,44 @@ class Settings(BaseSettings):
     langfuse_secret_key: str = ""
     langfuse_host: str = "https://cloud.langfuse.com"
     weather_api_key: str = ""
-    
+
     # LLM Configuration
     llm_model: str = "llama-3.1-70b-versatile"
     llm_temperature: float = 0.7
-    
+
+    # Shared cache (SQLite in WAL mode, shared by every worker on the host)
+    cache_path: str = ".cache/travel_planner.db"
+    plan_cache_ttl_seconds: int = 3600
+    tool_cache_ttl_seconds: int = 6 * 3600
+    task_cache_ttl_seconds: int = 24 * 3600
+    plan_store_ttl_seconds: int = 7 * 24 * 3600
+    cache_lease_seconds: int = 120
+    cache_purge_interval_seconds: int = 300
+
+    # End-to-end deadline for a plan, split into per-task time and iteration budgets
+    plan_deadline_seconds: float = 30
+    seconds_per_agent_iteration: float = 2.5
+
+    # Multi-leg trips: legs planned concurrently
+    max_parallel_legs: int = 4
+
+    # Background cache warmer for trending destinations; one worker per host warms at a time
+    warmer_enabled: bool = True
+    warmer_interval_seconds: float = 15
+    warmer_max_jobs_per_minute: int = 2  # Across the host; every job is a full crew run
+    warmer_top_k: int = 20
+    warmer_min_count: int = 3  # Estimated requests, summed across workers, before a key is worth a crew run
+    warmer_rewarm_seconds: int = 3600
+    warmer_decay_seconds: int = 3600
+
+    # Server Configuration
+    host: str = "0.0.0.0"
+    port: int = 8000
+    web_concurrency: Optional[int] = None  # Defaults to one worker per CPU core
+
     class Config:
         env_file = ".env"
 
 @lru_cache()
 def get_settings():
-    return Settings()
\ No newline at end of file
+    return Settings()
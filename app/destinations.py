@@ -0,0 +1,197 @@
+from app.schemas import Destination
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import json
+import re
+import unicodedata
+
+CITIES_PATH = Path(__file__).parent / "data" / "cities.json"
+
+# Minimum trigram similarity for a fuzzy suggestion to count
+FUZZY_THRESHOLD = 0.45
+
+# Common alternative names for the countries in the dataset
+COUNTRY_ALIASES = {
+    "uk": "united kingdom",
+    "great britain": "united kingdom",
+    "britain": "united kingdom",
+    "england": "united kingdom",
+    "scotland": "united kingdom",
+    "us": "united states",
+    "usa": "united states",
+    "united states of america": "united states",
+    "america": "united states",
+    "uae": "united arab emirates",
+    "czechia": "czech republic",
+    "korea": "south korea",
+    "holland": "netherlands",
+    "the netherlands": "netherlands",
+}
+
+def _fold_char(ch: str) -> str:
+    # Strip accents from Latin letters ("é" -> "e") but keep other scripts intact
+    decomposed = unicodedata.normalize("NFKD", ch)
+    if decomposed[0].isascii():
+        return "".join(c for c in decomposed if not unicodedata.combining(c))
+    return ch
+
+def normalize(text: str) -> str:
+    """Casefolds, strips Latin accents and punctuation, and collapses whitespace; other scripts are kept"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = "".join(_fold_char(ch) for ch in text)
+    text = re.sub(r"[\W_]+", " ", text)
+    return text.strip()
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class DestinationResolver:
+    """
+    Resolves free-text destinations ("Paris, France", "paree") to a canonical city.
+
+    Built once from the city/alias dataset: exact names and aliases go in a dict,
+    a sorted list of names serves prefix lookups via bisect, and a trigram
+    inverted index serves fuzzy lookups. Only exact matches resolve, since the
+    result feeds cache keys; prefix and fuzzy matches are suggestions only.
+    """
+
+    def __init__(self, cities: List[dict]):
+        self.cities: Dict[str, Destination] = {}
+        self._exact: Dict[str, str] = {}
+        self._prefix: List[Tuple[str, str]] = []
+        self._trigrams: Dict[str, set] = defaultdict(set)
+        self._term_grams: Dict[str, set] = {}
+        self._countries: Dict[str, str] = {alias: country for alias, country in COUNTRY_ALIASES.items()}
+
+        for city in cities:
+            destination = Destination(
+                id=city["id"],
+                name=city["name"],
+                country=city["country"],
+                latitude=city["latitude"],
+                longitude=city["longitude"]
+            )
+            self.cities[destination.id] = destination
+            self._countries[normalize(destination.country)] = normalize(destination.country)
+
+            terms = [city["name"], city["id"].replace("-", " "), *city.get("aliases", [])]
+            for term in {normalize(t) for t in terms if t}:
+                self._exact.setdefault(term, destination.id)
+                self._prefix.append((term, destination.id))
+                grams = trigrams(term)
+                self._term_grams[term] = grams
+                for gram in grams:
+                    self._trigrams[gram].add(term)
+
+        self._prefix.sort()
+
+    @classmethod
+    def from_file(cls, path: Path = CITIES_PATH) -> "DestinationResolver":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _fuzzy(self, query: str) -> Optional[str]:
+        query_grams = trigrams(query)
+        overlap: Dict[str, int] = defaultdict(int)
+        for gram in query_grams:
+            for term in self._trigrams.get(gram, ()):
+                overlap[term] += 1
+
+        best_term, best_score = None, 0.0
+        for term, shared in overlap.items():
+            # Dice coefficient over trigram sets
+            score = 2 * shared / (len(query_grams) + len(self._term_grams[term]))
+            if score > best_score:
+                best_term, best_score = term, score
+
+        if best_score < FUZZY_THRESHOLD:
+            return None
+        return self._exact[best_term]
+
+    def prefix_matches(self, prefix: str, limit: int = 10) -> List[Destination]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        matches: List[Destination] = []
+        seen = set()
+        start = bisect_left(self._prefix, (prefix, ""))
+        for term, city_id in self._prefix[start:]:
+            if not term.startswith(prefix):
+                break
+            if city_id not in seen:
+                seen.add(city_id)
+                matches.append(self.cities[city_id])
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def _split_country(self, query: str) -> Tuple[str, Optional[str]]:
+        """Splits "Paris, France" or "Paris France" into the city part and a canonical country"""
+        if "," in query:
+            city, country = query.rsplit(",", 1)
+            return normalize(city), self._countries.get(normalize(country), normalize(country))
+
+        normalized = normalize(query)
+        words = normalized.split()
+        for size in range(min(4, len(words) - 1), 0, -1):
+            tail = " ".join(words[-size:])
+            if tail in self._countries:
+                return " ".join(words[:-size]), self._countries[tail]
+        return normalized, None
+
+    def resolve(self, query: str) -> Optional[Destination]:
+        """
+        Returns the city whose name or alias matches exactly, checking the country
+        when one is given ("Paris, Texas" does not resolve), or None.
+        """
+        normalized = normalize(query)
+        if not normalized:
+            return None
+        if normalized in self._exact and "," not in query:
+            return self.cities[self._exact[normalized]]
+
+        city, country = self._split_country(query)
+        city_id = self._exact.get(city)
+        if city_id is None:
+            return None
+        destination = self.cities[city_id]
+        if country is not None and country != normalize(destination.country):
+            return None
+        return destination
+
+    def suggest(self, query: str, limit: int = 10) -> List[Destination]:
+        """Exact match first, then prefix and fuzzy matches; for display only, never for cache keys"""
+        suggestions = []
+        exact = self.resolve(query)
+        if exact is not None:
+            suggestions.append(exact)
+        city, _ = self._split_country(query)
+        for match in self.autocomplete(city or query, limit):
+            if match not in suggestions:
+                suggestions.append(match)
+        return suggestions[:limit]
+
+    def autocomplete(self, query: str, limit: int = 10) -> List[Destination]:
+        """Prefix matches first, topped up with the best fuzzy match for typos"""
+        matches = self.prefix_matches(query, limit)
+        if len(matches) < limit:
+            city_id = self._fuzzy(normalize(query))
+            if city_id and self.cities[city_id] not in matches:
+                matches.append(self.cities[city_id])
+        return matches
+
+@lru_cache()
+def get_destination_resolver() -> DestinationResolver:
+    return DestinationResolver.from_file()
+
+def canonical_destination_id(destination: str) -> str:
+    """Canonical city ID for cache keys; unknown destinations fall back to their normalized text"""
+    resolved = get_destination_resolver().resolve(destination)
+    if resolved is not None:
+        return resolved.id
+    return normalize(destination) or destination.strip().casefold()
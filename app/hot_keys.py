@@ -0,0 +1,82 @@
+from app.destinations import canonical_destination_id
+from app.schemas import TravelRequest
+from typing import Dict, List, Tuple
+import hashlib
+import time
+
+class CountMinSketch:
+    """Fixed-size frequency estimator; estimates never undercount"""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+
+    def _indexes(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4 * self.depth).digest()
+        return [
+            int.from_bytes(digest[4 * row:4 * row + 4], "little") % self.width
+            for row in range(self.depth)
+        ]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Adds count to key and returns its new estimate"""
+        estimate = None
+        for row, index in zip(self.rows, self._indexes(key)):
+            row[index] += count
+            estimate = row[index] if estimate is None else min(estimate, row[index])
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def decay(self):
+        """Halves every counter so old traffic fades and new trends can take over"""
+        for row in self.rows:
+            for index in range(self.width):
+                row[index] >>= 1
+
+class HotKeyTracker:
+    """
+    Tracks the top-k destination and travel-date keys by estimated request count,
+    remembering the most recent request seen for each as the one to warm.
+
+    Dates are kept exact rather than bucketed, since the plan and task caches the
+    warmer fills are keyed by exact dates too. Keys whose count decays to 0 are dropped.
+    """
+
+    def __init__(self, k: int = 20, decay_seconds: float = 3600):
+        self.k = k
+        self.decay_seconds = decay_seconds
+        self.sketch = CountMinSketch()
+        self.top: Dict[str, int] = {}
+        self.exemplars: Dict[str, TravelRequest] = {}
+        self._last_decay = time.monotonic()
+
+    @staticmethod
+    def key_for(request: TravelRequest) -> str:
+        return f"{canonical_destination_id(request.destination)}|{request.start_date}|{request.end_date}"
+
+    def record(self, request: TravelRequest):
+        if time.monotonic() - self._last_decay > self.decay_seconds:
+            self.sketch.decay()
+            decayed = {key: self.sketch.estimate(key) for key in self.top}
+            self.top = {key: count for key, count in decayed.items() if count > 0}
+            self.exemplars = {key: self.exemplars[key] for key in self.top}
+            self._last_decay = time.monotonic()
+
+        key = self.key_for(request)
+        count = self.sketch.add(key)
+        if key in self.top or len(self.top) < self.k:
+            self.top[key] = count
+        else:
+            coldest = min(self.top, key=self.top.get)
+            if count <= self.top[coldest]:
+                return
+            del self.top[coldest]
+            self.exemplars.pop(coldest, None)
+            self.top[key] = count
+        self.exemplars[key] = request
+
+    def hottest(self) -> List[Tuple[str, int]]:
+        return sorted(self.top.items(), key=lambda item: item[1], reverse=True)
@@ -1,10 +1,25 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.schemas import TravelRequest, TravelPlan
-from app.agents.travel_crew import create_travel_planning_crew
+from pydantic import ValidationError
+from app.schemas import Destination, MultiLegTravelRequest, TravelRequest, TravelRequestUpdate, TravelPlan
+from app.planner import (
+    allocate_leg_budgets,
+    build_multi_leg_plan,
+    build_travel_plan,
+    load_plan_record,
+    plan_cache_key,
+    task_budget_report,
+)
+from app.cache import get_cache
+from app.config import get_settings
+from app.destinations import get_destination_resolver
+from app.warmer import get_cache_warmer
+from typing import List, Optional
 from datetime import datetime
 import json
 import logging
+import os
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,13 +38,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def build_destination_index():
+    # Build the destination index once per worker instead of on the first request
+    resolver = get_destination_resolver()
+    logger.info(f"Destination index built with {len(resolver.cities)} cities")
+
+@app.on_event("startup")
+async def start_cache_warmer():
+    if get_settings().warmer_enabled:
+        get_cache_warmer().start()
+
+@app.on_event("shutdown")
+async def stop_cache_warmer():
+    await get_cache_warmer().stop()
+
+@app.middleware("http")
+async def track_in_flight_requests(request: Request, call_next):
+    # The cache warmer only runs while no worker has interactive requests in flight
+    warmer = get_cache_warmer()
+    warmer.in_flight += 1
+    try:
+        return await call_next(request)
+    finally:
+        warmer.in_flight -= 1
+
 @app.get("/")
 def root():
     return {
         "message": "AI Travel Planner API",
         "endpoints": {
             "plan": "/api/plan",
+            "replan": "/api/plan/{plan_id}",
+            "multi_leg_plan": "/api/plan/multi-leg",
+            "destinations": "/api/destinations/autocomplete",
             "health": "/health",
+            "cache_stats": "/api/cache/stats",
+            "warmer_stats": "/api/warmer/stats",
+            "task_budgets": "/api/metrics/task-budgets",
             "docs": "/docs"
         }
     }
@@ -38,8 +84,45 @@ def root():
 def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/api/destinations/autocomplete", response_model=List[Destination])
+def autocomplete_destinations(
+    q: str = Query(..., min_length=1, description="Partial destination name"),
+    limit: int = Query(default=8, ge=1, le=25)
+):
+    return get_destination_resolver().autocomplete(q, limit)
+
+@app.get("/api/destinations/resolve", response_model=Destination)
+def resolve_destination(q: str = Query(..., min_length=1, description="Destination name or alias")):
+    resolver = get_destination_resolver()
+    destination = resolver.resolve(q)
+    if destination is None:
+        # Close matches are offered for the caller to pick from, never resolved automatically
+        raise HTTPException(status_code=404, detail={
+            "message": f"Unknown destination: {q}",
+            "suggestions": [suggestion.model_dump() for suggestion in resolver.suggest(q, limit=5)]
+        })
+    return destination
+
+@app.get("/api/cache/stats")
+def cache_stats():
+    """Hit/miss counters per cache namespace, aggregated across all workers"""
+    return {"pid": os.getpid(), "namespaces": get_cache().stats()}
+
+@app.get("/api/metrics/task-budgets")
+def task_budget_metrics():
+    """Per-task deadline overrun rates, for tuning the time budget split"""
+    return task_budget_report()
+
+@app.get("/api/warmer/stats")
+def warmer_stats():
+    """Hot keys across all workers and how often plans for warmed keys were served from the cache"""
+    return {"pid": os.getpid(), **get_cache_warmer().stats()}
+
 @app.post("/api/plan", response_model=TravelPlan)
-async def create_travel_plan(request: TravelRequest):
+async def create_travel_plan(
+    request: TravelRequest,
+    deadline_header: Optional[float] = Header(default=None, alias="X-Deadline-Seconds", gt=0)
+):
     """
     Create a complete travel plan using multi-agent collaboration.
     
@@ -48,49 +131,124 @@ async def create_travel_plan(request: TravelRequest):
     2. Weather Agent provides forecast and packing advice
     3. Hotel Agent coordinates accommodations with flight arrival
     4. Attractions Agent curates activities based on weather and preferences
+    
+    The X-Deadline-Seconds header (or the deadline_seconds field) bounds the whole
+    request; sections that miss it are listed in degraded_sections.
     """
     try:
         logger.info(f"Creating travel plan for {request.destination}")
+        if request.deadline_seconds is None and deadline_header is not None:
+            request = request.model_copy(update={"deadline_seconds": deadline_header})
         
-        # Create the specialized crew
-        crew = create_travel_planning_crew(
-            destination=request.destination,
-            start_date=request.start_date.isoformat(),
-            end_date=request.end_date.isoformat(),
-            budget=request.budget,
-            preferences=request.preferences
+        get_cache_warmer().record(request)
+        
+        # Identical requests from any worker share one crew run via the shared cache
+        # A partial plan is never stored, so the next identical request gets a fresh run
+        key = plan_cache_key(request)
+        computed = []
+
+        def compute():
+            computed.append(True)
+            return build_travel_plan(request)
+
+        plan = await run_in_threadpool(
+            get_cache().get_or_compute,
+            key,
+            compute,
+            get_settings().plan_cache_ttl_seconds,
+            should_store=lambda plan: not plan["degraded_sections"]
         )
+        get_cache_warmer().record_served(key, hit=not computed)
+        return TravelPlan(**plan)
         
-        # Execute the crew - agents will collaborate sequentially
-        result = crew.kickoff()
+    except Exception as e:
+        logger.error(f"Error creating travel plan: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/plan/multi-leg", response_model=TravelPlan)
+async def create_multi_leg_travel_plan(
+    request: MultiLegTravelRequest,
+    deadline_header: Optional[float] = Header(default=None, alias="X-Deadline-Seconds", gt=0)
+):
+    """
+    Create one travel plan for a multi-city trip, e.g. Paris then Rome then Barcelona.
+    
+    The budget is split across legs by nights, each leg gets its own crew, and
+    up to max_parallel_legs crews run at once. Transfers between cities come
+    from the flight search tool.
+    """
+    try:
+        destinations = " -> ".join(leg.destination for leg in request.legs)
+        logger.info(f"Creating multi-leg travel plan for {destinations}")
+        if request.deadline_seconds is None and deadline_header is not None:
+            request = request.model_copy(update={"deadline_seconds": deadline_header})
+        for leg, leg_budget in zip(request.legs, allocate_leg_budgets(request)):
+            get_cache_warmer().record(TravelRequest(
+                destination=leg.destination,
+                start_date=leg.start_date,
+                end_date=leg.end_date,
+                budget=leg_budget,
+                preferences=leg.preferences if leg.preferences is not None else request.preferences,
+                travelers=request.travelers
+            ))
         
-        # Parse the result (in production, you'd have more robust parsing)
-        logger.info("Travel plan created successfully")
+        plan = await run_in_threadpool(build_multi_leg_plan, request)
+        return TravelPlan(**plan)
         
-        # For now, return a structured response
-        # In production, you'd parse the agent outputs more carefully
-        return TravelPlan(
-            destination=request.destination,
-            dates=f"{request.start_date} to {request.end_date}",
-            flights=[],  # Would be populated from flight_agent output
-            hotels=[],   # Would be populated from hotel_agent output
-            weather={    # Would be populated from weather_agent output
-                "avg_temp_high": 45,
-                "avg_temp_low": 37,
-                "condition": "cold",
-                "precipitation_chance": 0.4,
-                "recommendations": ["Pack warm layers"]
-            },
-            attractions=[],  # Would be populated from attractions_agent output
-            total_estimated_cost=request.budget * 0.85,
-            reasoning_summary=str(result),
-            langfuse_trace_url=None
+    except Exception as e:
+        logger.error(f"Error creating multi-leg travel plan: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/plan/{plan_id}", response_model=TravelPlan)
+def get_travel_plan(plan_id: str):
+    record = load_plan_record(plan_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Plan {plan_id} not found or expired")
+    return TravelPlan(**record["plan"])
+
+@app.patch("/api/plan/{plan_id}", response_model=TravelPlan)
+async def replan_travel_plan(
+    plan_id: str,
+    changes: TravelRequestUpdate,
+    deadline_header: Optional[float] = Header(default=None, alias="X-Deadline-Seconds", gt=0)
+):
+    """
+    Re-plan a previous trip with some fields changed.
+    
+    Only the tasks whose inputs depend on the changed fields are re-run; the
+    stored output of every other task is reused. For example, changing the
+    preferences re-runs the hotel and attractions agents but keeps the flight
+    and weather results.
+    """
+    record = load_plan_record(plan_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Plan {plan_id} not found or expired")
+    
+    try:
+        request = TravelRequest(**{**record["request"], **changes.model_dump(exclude_unset=True)})
+    except ValidationError as e:
+        # Changes such as "preferences": null pass TravelRequestUpdate but not TravelRequest
+        raise HTTPException(status_code=422, detail=json.loads(e.json()))
+    
+    try:
+        if changes.deadline_seconds is None and deadline_header is not None:
+            request = request.model_copy(update={"deadline_seconds": deadline_header})
+        logger.info(f"Re-planning {plan_id} with changes to {sorted(changes.model_dump(exclude_unset=True))}")
+        plan = await run_in_threadpool(
+            build_travel_plan,
+            request,
+            record.get("provided_outputs"),
+            stored_outputs=record.get("task_outputs")
         )
+        return TravelPlan(**plan)
         
     except Exception as e:
-        logger.error(f"Error creating travel plan: {str(e)}")
+        logger.error(f"Error re-planning travel plan: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    settings = get_settings()
+    # One worker per core by default; all workers share the SQLite-backed cache
+    workers = settings.web_concurrency or os.cpu_count() or 1
+    uvicorn.run("app.main:app", host=settings.host, port=settings.port, workers=workers)
@@ -0,0 +1,351 @@
+from app.agents.travel_crew import (
+    TASK_ORDER,
+    build_task_inputs,
+    create_travel_planning_crew,
+    is_stopped_output,
+    split_task_budgets,
+    task_output_keys,
+)
+from app.cache import get_cache, make_key
+from app.config import get_settings
+from app.destinations import canonical_destination_id, get_destination_resolver
+from app.schemas import FlightOption, MultiLegTravelRequest, TravelRequest, TravelPlan
+from app.tools.flight_tools import search_flights
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Dict, List, Optional
+import json
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class PlanAbandoned(Exception):
+    """Raised from a task callback once the plan's deadline has passed, so the crew stops before its next task"""
+
+def plan_cache_key(request: TravelRequest) -> str:
+    """Key for a whole plan; requests naming the same city in different ways share it"""
+    return make_key(
+        "plan",
+        **{
+            **request.model_dump(mode="json", exclude={"deadline_seconds"}),
+            "destination": canonical_destination_id(request.destination)
+        }
+    )
+
+def _record_task_budget(name: str, elapsed: float, budget_seconds: float, degraded: bool):
+    cache = get_cache()
+    counter = f"task_budget:{name}"
+    cache.increment(counter, "runs")
+    cache.increment(counter, "elapsed_seconds", elapsed)
+    cache.increment(counter, "budget_seconds", budget_seconds)
+    if elapsed > budget_seconds:
+        cache.increment(counter, "overruns")
+    if degraded:
+        cache.increment(counter, "degraded")
+
+def task_budget_report() -> dict:
+    """Per-task overrun and degradation rates across all workers, for tuning TASK_ITERATIONS"""
+    report = {}
+    for counter, values in get_cache().counters("task_budget:").items():
+        runs = values.get("runs", 0)
+        report[counter.split(":", 1)[1]] = {
+            "runs": int(runs),
+            "overrun_rate": round(values.get("overruns", 0) / runs, 4) if runs else 0.0,
+            "degraded_rate": round(values.get("degraded", 0) / runs, 4) if runs else 0.0,
+            "avg_elapsed_seconds": round(values.get("elapsed_seconds", 0) / runs, 2) if runs else 0.0,
+            "avg_budget_seconds": round(values.get("budget_seconds", 0) / runs, 2) if runs else 0.0
+        }
+    return report
+
+def _plan_record_key(plan_id: str) -> str:
+    return f"plan_record:{plan_id}"
+
+def load_plan_record(plan_id: str) -> Optional[dict]:
+    """Returns the stored request and plan for a previous plan ID, if it has not expired"""
+    return get_cache().get(_plan_record_key(plan_id))
+
+def build_travel_plan(
+    request: TravelRequest,
+    provided_outputs: Optional[Dict[str, str]] = None,
+    deadline: Optional[float] = None,
+    stored_outputs: Optional[Dict[str, str]] = None
+) -> dict:
+    """
+    Runs the crew for a request, reusing any task output already stored for
+    identical task inputs, and stores the result under a new plan ID.
+
+    provided_outputs supplies finished output for tasks that should not run at all,
+    e.g. the inter-city transfer standing in for a multi-leg trip's flight search.
+
+    deadline is a time.monotonic() timestamp; by default it is derived from the
+    request's deadline_seconds. The time left is split into per-task budgets, and
+    if the deadline passes the plan is returned with whatever sections finished.
+    The crew is then stopped: at most the task already running finishes in the
+    background, and its output is still cached, but no later task starts.
+
+    stored_outputs maps task keys to outputs kept in a previous plan's record, and
+    is used when the shared task store has already expired them.
+    """
+    provided_outputs = provided_outputs or {}
+    stored_outputs = stored_outputs or {}
+    cache = get_cache()
+    settings = get_settings()
+    if deadline is None:
+        deadline = time.monotonic() + (request.deadline_seconds or settings.plan_deadline_seconds)
+
+    start_date = request.start_date.isoformat()
+    end_date = request.end_date.isoformat()
+    inputs = build_task_inputs(
+        request.destination,
+        start_date,
+        end_date,
+        request.budget,
+        request.preferences,
+        request.date_flexibility_days
+    )
+    keys = task_output_keys(inputs, provided_outputs)
+
+    outputs = dict(provided_outputs)
+    for name in TASK_ORDER:
+        if name in outputs:
+            continue
+        stored = cache.get(keys[name], stored_outputs.get(keys[name]))
+        if stored is not None:
+            outputs[name] = stored
+
+    pending = [name for name in TASK_ORDER if name not in outputs]
+    reused = [name for name in TASK_ORDER if name in outputs and name not in provided_outputs]
+    logger.info(f"Reusing tasks {reused}, running {pending}")
+
+    degraded = []
+    if pending:
+        budgets = split_task_budgets(
+            pending,
+            deadline - time.monotonic(),
+            settings.seconds_per_agent_iteration,
+            request.date_flexibility_days
+        )
+        lock = threading.Lock()
+        state = {"last_finished": time.monotonic(), "abandoned": False}
+
+        def store_output(name: str, raw_output: str):
+            stopped = is_stopped_output(raw_output)
+            # Output that arrives after we gave up on the crew is still worth caching
+            if not stopped:
+                cache.set(keys[name], raw_output, settings.task_cache_ttl_seconds)
+            with lock:
+                if state["abandoned"]:
+                    # Nobody is waiting for the rest of the crew, so don't start its next agent
+                    raise PlanAbandoned(f"Deadline passed after the {name} task")
+                now = time.monotonic()
+                elapsed = now - state["last_finished"]
+                state["last_finished"] = now
+                outputs[name] = raw_output
+                if stopped:
+                    degraded.append(name)
+            _record_task_budget(name, elapsed, budgets[name]["seconds"], stopped)
+
+        # Create the specialized crew
+        crew = create_travel_planning_crew(
+            destination=request.destination,
+            start_date=start_date,
+            end_date=end_date,
+            budget=request.budget,
+            preferences=request.preferences,
+            date_flexibility_days=request.date_flexibility_days,
+            reuse_outputs=dict(outputs),
+            on_task_output=store_output,
+            task_budgets=budgets
+        )
+
+        # Execute the crew - agents will collaborate sequentially
+        # It runs on its own thread so we can stop waiting for it at the deadline
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            executor.submit(crew.kickoff).result(timeout=max(0.0, deadline - time.monotonic()))
+        except FuturesTimeoutError:
+            logger.warning(f"Deadline reached for {request.destination}, returning a partial plan")
+        finally:
+            executor.shutdown(wait=False)
+
+        with lock:
+            state["abandoned"] = True
+            outputs = dict(outputs)
+            elapsed = time.monotonic() - state["last_finished"]
+        for name in pending:
+            if name not in outputs:
+                degraded.append(name)
+                _record_task_budget(name, elapsed, budgets[name]["seconds"], True)
+                # Only the first unfinished task was actually running
+                elapsed = 0.0
+
+    # Parse the result (in production, you'd have more robust parsing)
+    logger.info("Travel plan created successfully")
+
+    # For now, return a structured response
+    # In production, you'd parse the agent outputs more carefully
+    plan = TravelPlan(
+        destination=request.destination,
+        dates=f"{request.start_date} to {request.end_date}",
+        flights=[],  # Would be populated from flight_agent output
+        hotels=[],   # Would be populated from hotel_agent output
+        weather={    # Would be populated from weather_agent output
+            "avg_temp_high": 45,
+            "avg_temp_low": 37,
+            "condition": "cold",
+            "precipitation_chance": 0.4,
+            "recommendations": ["Pack warm layers"]
+        },
+        attractions=[],  # Would be populated from attractions_agent output
+        total_estimated_cost=request.budget * 0.85,
+        reasoning_summary="\n\n".join(str(outputs.get(name, "")) for name in TASK_ORDER),
+        langfuse_trace_url=None,
+        plan_id=uuid.uuid4().hex,
+        replanned_tasks=pending,
+        degraded_sections=[name for name in TASK_ORDER if name in degraded]
+    )
+
+    plan_data = plan.model_dump(mode="json")
+    # The record outlives the task store, so it keeps its own copy of each task's output for re-planning
+    task_outputs = {
+        keys[name]: outputs[name]
+        for name in TASK_ORDER
+        if name in outputs and name not in provided_outputs and name not in degraded
+    }
+    cache.set(
+        _plan_record_key(plan.plan_id),
+        {
+            "request": request.model_dump(mode="json"),
+            "provided_outputs": provided_outputs,
+            "task_outputs": task_outputs,
+            "plan": plan_data
+        },
+        settings.plan_store_ttl_seconds
+    )
+    return plan_data
+
+def allocate_leg_budgets(request: MultiLegTravelRequest) -> List[float]:
+    """
+    Splits the trip budget across legs in proportion to nights spent in each.
+
+    Each leg's share then follows the usual split, so the flight share of a leg pays
+    for getting there: the inbound flight for the first leg, the transfer for the rest.
+    """
+    nights = [max(1, (leg.end_date - leg.start_date).days) for leg in request.legs]
+    total_nights = sum(nights)
+    shares = [round(request.budget * n / total_nights, 2) for n in nights[:-1]]
+    # The last leg takes the rounding remainder so the shares add up to the budget exactly
+    return shares + [round(request.budget - sum(shares), 2)]
+
+def _search_transfer(origin: str, destination: str, travel_date: str, budget: float) -> str:
+    # Transfers use the same flight search the flight agent does, so they share its cache
+    return search_flights.run(
+        destination=destination,
+        start_date=travel_date,
+        end_date="",
+        budget=budget,
+        origin=origin
+    )
+
+def _merge_leg_plans(request: MultiLegTravelRequest, leg_plans: List[dict], transfers: List[FlightOption]) -> TravelPlan:
+    resolver = get_destination_resolver()
+    names = []
+    for leg in request.legs:
+        place = resolver.resolve(leg.destination)
+        names.append(place.name if place else leg.destination)
+
+    weathers = [plan["weather"] for plan in leg_plans]
+    recommendations = []
+    for weather in weathers:
+        for recommendation in weather["recommendations"]:
+            if recommendation not in recommendations:
+                recommendations.append(recommendation)
+
+    sections = [
+        f"=== Leg {index + 1}: {names[index]} ===\n{plan['reasoning_summary']}"
+        for index, plan in enumerate(leg_plans)
+    ]
+
+    return TravelPlan(
+        destination=" -> ".join(names),
+        dates=f"{request.legs[0].start_date} to {request.legs[-1].end_date}",
+        flights=list(leg_plans[0]["flights"]) + transfers,
+        hotels=[hotel for plan in leg_plans for hotel in plan["hotels"]],
+        weather={
+            "avg_temp_high": max(weather["avg_temp_high"] for weather in weathers),
+            "avg_temp_low": min(weather["avg_temp_low"] for weather in weathers),
+            "condition": "; ".join(f"{name}: {weather['condition']}" for name, weather in zip(names, weathers)),
+            "precipitation_chance": max(weather["precipitation_chance"] for weather in weathers),
+            "recommendations": recommendations
+        },
+        attractions=[attraction for plan in leg_plans for attraction in plan["attractions"]],
+        total_estimated_cost=sum(plan["total_estimated_cost"] for plan in leg_plans),
+        reasoning_summary="\n\n".join(sections),
+        langfuse_trace_url=None,
+        replanned_tasks=[
+            f"leg{index + 1}:{task}"
+            for index, plan in enumerate(leg_plans)
+            for task in plan["replanned_tasks"]
+        ],
+        degraded_sections=[
+            f"leg{index + 1}:{task}"
+            for index, plan in enumerate(leg_plans)
+            for task in plan["degraded_sections"]
+        ]
+    )
+
+def build_multi_leg_plan(request: MultiLegTravelRequest) -> dict:
+    """
+    Plans a multi-city trip by running one crew per leg concurrently.
+
+    For every leg after the first, the one-way transfer from the previous city on the
+    leg's start date is looked up with search_flights and handed to the leg in place of
+    its flight task, so the hotel agent still sees an arrival time. Total latency is
+    roughly that of the slowest leg. All legs share the trip's deadline.
+
+    The first leg's flight search covers getting to the trip. The flight home from the
+    last city is not planned, since requests do not say where home is.
+    """
+    settings = get_settings()
+    budgets = allocate_leg_budgets(request)
+    deadline = time.monotonic() + (request.deadline_seconds or settings.plan_deadline_seconds)
+
+    def plan_leg(index: int):
+        leg = request.legs[index]
+        leg_request = TravelRequest(
+            destination=leg.destination,
+            start_date=leg.start_date,
+            end_date=leg.end_date,
+            budget=budgets[index],
+            preferences=leg.preferences if leg.preferences is not None else request.preferences,
+            travelers=request.travelers
+        )
+        if index == 0:
+            return build_travel_plan(leg_request, deadline=deadline), None
+
+        origin = request.legs[index - 1].destination
+        transfer_output = _search_transfer(
+            origin,
+            leg.destination,
+            leg.start_date.isoformat(),
+            round(budgets[index] * 0.4, 2)
+        )
+        options = json.loads(transfer_output).get("flights", [])
+        transfer = None
+        if options:
+            cheapest = min(options, key=lambda option: option["price"])
+            transfer = FlightOption(**{
+                **cheapest,
+                "notes": f"Transfer from {origin} to {leg.destination}. {cheapest.get('notes') or ''}".strip()
+            })
+        return build_travel_plan(leg_request, {"flight": transfer_output}, deadline), transfer
+
+    logger.info(f"Planning {len(request.legs)} legs with up to {settings.max_parallel_legs} in parallel")
+    with ThreadPoolExecutor(max_workers=max(1, settings.max_parallel_legs)) as executor:
+        results = list(executor.map(plan_leg, range(len(request.legs))))
+
+    leg_plans = [plan for plan, _ in results]
+    transfers = [transfer for _, transfer in results if transfer is not None]
+    return _merge_leg_plans(request, leg_plans, transfers).model_dump(mode="json")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional
 from datetime import date
 
@@ -12,6 +12,75 @@ class TravelRequest(BaseModel):
         description="User preferences (e.g., museums, food, adventure)"
     )
     travelers: int = Field(default=1, description="Number of travelers")
+    date_flexibility_days: int = Field(
+        default=0,
+        ge=0,
+        le=14,
+        description="How many days earlier or later the trip may start and end to find cheaper flights"
+    )
+    deadline_seconds: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="End-to-end time limit; sections not finished in time are returned as degraded"
+    )
+
+class TripLeg(BaseModel):
+    destination: str = Field(..., description="Destination city/country for this leg")
+    start_date: date = Field(..., description="Arrival date for this leg")
+    end_date: date = Field(..., description="Departure date for this leg")
+    preferences: Optional[List[str]] = Field(
+        default=None,
+        description="Preferences for this leg; defaults to the trip's preferences"
+    )
+
+class MultiLegTravelRequest(BaseModel):
+    legs: List[TripLeg] = Field(..., min_length=1, description="Legs in travel order")
+    budget: float = Field(..., description="Total budget in USD across all legs")
+    preferences: List[str] = Field(
+        default=[],
+        description="User preferences (e.g., museums, food, adventure)"
+    )
+    travelers: int = Field(default=1, description="Number of travelers")
+    deadline_seconds: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="End-to-end time limit; sections not finished in time are returned as degraded"
+    )
+
+    @model_validator(mode="after")
+    def check_leg_dates(self):
+        for leg in self.legs:
+            if leg.end_date < leg.start_date:
+                raise ValueError(f"Leg to {leg.destination} ends before it starts")
+        for previous, leg in zip(self.legs, self.legs[1:]):
+            if leg.start_date < previous.end_date:
+                raise ValueError(f"Leg to {leg.destination} starts before the leg to {previous.destination} ends")
+        return self
+
+class TravelRequestUpdate(BaseModel):
+    """Fields to change on a previous plan; anything left unset is carried over"""
+    destination: Optional[str] = Field(default=None, description="Destination city/country")
+    start_date: Optional[date] = Field(default=None, description="Travel start date")
+    end_date: Optional[date] = Field(default=None, description="Travel end date")
+    budget: Optional[float] = Field(default=None, description="Total budget in USD")
+    preferences: Optional[List[str]] = Field(
+        default=None,
+        description="User preferences (e.g., museums, food, adventure)"
+    )
+    travelers: Optional[int] = Field(default=None, description="Number of travelers")
+    date_flexibility_days: Optional[int] = Field(default=None, ge=0, le=14, description="Date flexibility in days")
+    deadline_seconds: Optional[float] = Field(default=None, gt=0, description="End-to-end time limit")
+
+class Destination(BaseModel):
+    id: str = Field(..., description="Canonical city ID used by tools and cache keys")
+    name: str
+    country: str
+    latitude: float
+    longitude: float
+
+    @property
+    def display_name(self) -> str:
+        return f"{self.name}, {self.country}"
 
 class FlightOption(BaseModel):
     airline: str
@@ -58,4 +127,13 @@ class TravelPlan(BaseModel):
     attractions: List[Attraction]
     total_estimated_cost: float
     langfuse_trace_url: Optional[str] = None
-    reasoning_summary: str
\ No newline at end of file
+    reasoning_summary: str
+    plan_id: Optional[str] = None
+    replanned_tasks: List[str] = Field(
+        default=[],
+        description="Tasks whose agents ran for this plan; the rest were reused"
+    )
+    degraded_sections: List[str] = Field(
+        default=[],
+        description="Tasks that were stopped or did not finish before the deadline"
+    )
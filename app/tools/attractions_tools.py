@@ -1,7 +1,10 @@
 from crewai_tools import tool
+from app.cache import cached_tool
+from app.destinations import get_destination_resolver, normalize
 import json
 
 @tool("search_attractions")
+@cached_tool("search_attractions")
 def search_attractions(
     destination: str,
     preferences: str = "",
@@ -21,7 +24,7 @@ def search_attractions(
         JSON string with curated attraction recommendations
     """
     mock_attractions = {
-        "Paris": [
+        "paris": [
             {
                 "name": "Louvre Museum",
                 "category": "museum",
@@ -73,8 +76,9 @@ def search_attractions(
         ]
     }
     
-    dest_lower = destination.lower()
-    attractions = mock_attractions.get(dest_lower.title(), mock_attractions["Paris"])
+    place = get_destination_resolver().resolve(destination)
+    city_id = place.id if place else normalize(destination)
+    attractions = mock_attractions.get(city_id, mock_attractions["paris"])
     
     # Filter based on weather if provided
     if "rain" in weather_condition.lower() or "cold" in weather_condition.lower():
@@ -96,7 +100,9 @@ def search_attractions(
     affordable = [a for a in attractions if a["cost"] <= budget][:6]
     
     return json.dumps({
-        "destination": destination,
+        "destination": place.display_name if place else destination,
+        "destination_id": city_id,
+        "destination_matched": city_id in mock_attractions,
         "attractions": affordable,
         "total_options": len(affordable),
         "weather_adapted": bool(weather_condition),
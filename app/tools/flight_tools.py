@@ -1,20 +1,85 @@
 from crewai_tools import tool
+from app.cache import cached_tool
+from app.destinations import get_destination_resolver, normalize
+from datetime import date, timedelta
+from functools import lru_cache
+import hashlib
 import json
+import numpy as np
+
+# Same limit as TravelRequest.date_flexibility_days
+MAX_FLEX_DAYS = 14
+
+def _route_seed(route_id: str, *salt) -> int:
+    payload = "|".join([route_id, *map(str, salt)])
+    return int.from_bytes(hashlib.sha256(payload.encode("utf-8")).digest()[:8], "little")
+
+@lru_cache(maxsize=512)
+def _fare_calendar(route_id: str, year: int):
+    """
+    Builds the mock round-trip fare calendar for a route and year: one outbound and
+    one return fare per day of the year, shaped by a route base fare, weekday and season.
+    """
+    rng = np.random.default_rng(_route_seed(route_id, year))
+    first_day = date(year, 1, 1)
+    days_in_year = (date(year + 1, 1, 1) - first_day).days
+
+    day_of_year = np.arange(days_in_year)
+    weekdays = (first_day.weekday() + day_of_year) % 7
+
+    base_fare = 250 + (_route_seed(route_id) % 450)
+    # Peaks in mid-July and over the December holidays
+    season = 1 + 0.25 * np.exp(-((day_of_year - 196) / 30.0) ** 2) + 0.2 * np.exp(-((day_of_year - 355) / 10.0) ** 2)
+    # Fridays and Sundays cost more, Tuesdays and Wednesdays less
+    weekday_factor = np.array([1.0, 0.9, 0.88, 0.95, 1.15, 1.05, 1.12])[weekdays]
+
+    outbound = base_fare / 2 * season * weekday_factor * rng.uniform(0.85, 1.2, days_in_year)
+    inbound = base_fare / 2 * season * weekday_factor * rng.uniform(0.85, 1.2, days_in_year)
+    return np.round(outbound, 2), np.round(inbound, 2)
+
+def _route_fares(route_id: str, days: np.ndarray):
+    """Outbound and return fares for an array of date ordinals, which may span several years"""
+    outbound = np.empty(days.shape)
+    inbound = np.empty(days.shape)
+    years = np.array([date.fromordinal(int(day)).year for day in days])
+    for year in np.unique(years):
+        mask = years == year
+        index = days[mask] - date(int(year), 1, 1).toordinal()
+        year_outbound, year_inbound = _fare_calendar(route_id, int(year))
+        outbound[mask] = year_outbound[index]
+        inbound[mask] = year_inbound[index]
+    return outbound, inbound
 
 @tool("search_flights")
-def search_flights(destination: str, start_date: str, end_date: str, budget: float) -> str:
+@cached_tool("search_flights")
+def search_flights(destination: str, start_date: str, end_date: str, budget: float, origin: str = "") -> str:
     """
     Search for flight options to a destination within budget.
     
     Args:
         destination: Target city/country
         start_date: Departure date (YYYY-MM-DD)
-        end_date: Return date (YYYY-MM-DD)
+        end_date: Return date (YYYY-MM-DD), or empty for a one-way flight
         budget: Maximum flight budget in USD
+        origin: Departure city, or empty for the traveler's home airport
     
     Returns:
         JSON string with flight options including airline, times, price, and details
     """
+    resolver = get_destination_resolver()
+    place = resolver.resolve(destination)
+    origin_place = resolver.resolve(origin) if origin else None
+    destination_id = place.id if place else normalize(destination)
+    origin_id = (origin_place.id if origin_place else normalize(origin)) if origin else ""
+
+    # Fares come from the same calendar as search_flexible_flights, so both tools agree on a date's price
+    route_id = f"{origin_id}>{destination_id}" if origin_id else destination_id
+    outbound_fares, _ = _route_fares(route_id, np.array([date.fromisoformat(start_date).toordinal()]))
+    fare = float(outbound_fares[0])
+    if end_date:
+        _, return_fares = _route_fares(route_id, np.array([date.fromisoformat(end_date).toordinal()]))
+        fare += float(return_fares[0])
+
     mock_flights = [
         {
             "airline": "Air France",
@@ -22,7 +87,7 @@ def search_flights(destination: str, start_date: str, end_date: str, budget: flo
             "departure_time": f"{start_date}T08:00:00",
             "arrival_time": f"{start_date}T20:30:00",
             "duration_hours": 8.5,
-            "price": min(budget * 0.4, 850),
+            "price": round(fare * 1.15, 2),
             "booking_class": "Economy",
             "notes": "Direct flight, arrives evening - comfortable arrival time for check-in"
         },
@@ -32,7 +97,7 @@ def search_flights(destination: str, start_date: str, end_date: str, budget: flo
             "departure_time": f"{start_date}T14:00:00",
             "arrival_time": f"{start_date}T02:30:00",
             "duration_hours": 10.5,
-            "price": min(budget * 0.3, 650),
+            "price": round(fare, 2),
             "booking_class": "Economy",
             "notes": "One layover in London, overnight arrival - may need early check-in"
         },
@@ -42,7 +107,7 @@ def search_flights(destination: str, start_date: str, end_date: str, budget: flo
             "departure_time": f"{start_date}T11:00:00",
             "arrival_time": f"{start_date}T13:15:00",
             "duration_hours": 9.25,
-            "price": min(budget * 0.35, 720),
+            "price": round(fare * 1.05, 2),
             "booking_class": "Economy",
             "notes": "One stop in Frankfurt, afternoon arrival"
         }
@@ -52,9 +117,98 @@ def search_flights(destination: str, start_date: str, end_date: str, budget: flo
     
     return json.dumps({
         "flights": affordable,
-        "destination": destination,
+        "origin": (origin_place.display_name if origin_place else origin) or None,
+        "origin_id": origin_id or None,
+        "destination": place.display_name if place else destination,
+        "destination_id": destination_id,
+        "trip_type": "round_trip" if end_date else "one_way",
         "outbound_date": start_date,
-        "return_date": end_date,
+        "return_date": end_date or None,
         "currency": "USD",
         "total_options": len(affordable)
-    }, indent=2)
\ No newline at end of file
+    }, indent=2)
+
+@tool("search_flexible_flights")
+@cached_tool("search_flexible_flights")
+def search_flexible_flights(
+    destination: str,
+    start_date: str,
+    end_date: str,
+    flex_days: int = 3,
+    budget: float = 0,
+    top_k: int = 5
+) -> str:
+    """
+    Find the cheapest departure/return date combinations within +/- flex_days of the
+    requested dates in a single call. Use this instead of calling search_flights
+    repeatedly when the traveler's dates are flexible.
+
+    Args:
+        destination: Target city/country
+        start_date: Preferred departure date (YYYY-MM-DD)
+        end_date: Preferred return date (YYYY-MM-DD)
+        flex_days: How many days earlier or later each date may move (0 to 14)
+        budget: Maximum round-trip fare in USD (0 for no limit)
+        top_k: Number of cheapest combinations to return
+
+    Returns:
+        JSON string with the full round-trip price matrix and the top_k cheapest date combinations
+    """
+    flex_days = min(max(int(flex_days), 0), MAX_FLEX_DAYS)
+    top_k = max(int(top_k), 0)
+    place = get_destination_resolver().resolve(destination)
+    route_id = place.id if place else normalize(destination)
+
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    offsets = np.arange(-flex_days, flex_days + 1)
+    departure_days = start.toordinal() + offsets
+    return_days = end.toordinal() + offsets
+    outbound_prices, _ = _route_fares(route_id, departure_days)
+    _, return_prices = _route_fares(route_id, return_days)
+
+    # Round-trip price for every departure (rows) x return (columns) pair
+    matrix = outbound_prices[:, None] + return_prices[None, :]
+    nights = return_days[None, :] - departure_days[:, None]
+    valid = nights > 0
+    if budget > 0:
+        valid &= matrix <= budget
+    matrix = np.where(valid, matrix, np.inf)
+
+    candidates = np.flatnonzero(np.isfinite(matrix))
+    k = min(top_k, candidates.size)
+    if k:
+        cheapest = candidates[np.argpartition(matrix.flat[candidates], k - 1)[:k]]
+        cheapest = cheapest[np.argsort(matrix.flat[cheapest])]
+    else:
+        cheapest = candidates
+
+    departure_dates = [(start + timedelta(days=int(o))).isoformat() for o in offsets]
+    return_dates = [(end + timedelta(days=int(o))).isoformat() for o in offsets]
+
+    combinations = []
+    for flat_index in cheapest:
+        row, column = np.unravel_index(flat_index, matrix.shape)
+        combinations.append({
+            "departure_date": departure_dates[row],
+            "return_date": return_dates[column],
+            "nights": int(nights[row, column]),
+            "outbound_price": float(outbound_prices[row]),
+            "return_price": float(return_prices[column]),
+            "total_price": round(float(matrix[row, column]), 2)
+        })
+
+    requested = matrix[flex_days, flex_days]
+    return json.dumps({
+        "destination": place.display_name if place else destination,
+        "destination_id": route_id,
+        "currency": "USD",
+        "departure_dates": departure_dates,
+        "return_dates": return_dates,
+        "price_matrix": [
+            [round(float(price), 2) if np.isfinite(price) else None for price in row]
+            for row in matrix
+        ],
+        "requested_dates_price": round(float(requested), 2) if np.isfinite(requested) else None,
+        "cheapest_combinations": combinations
+    }, indent=2)
@@ -1,8 +1,11 @@
 from crewai_tools import tool
+from app.cache import cached_tool
+from app.destinations import get_destination_resolver, normalize
 import json
 from datetime import datetime
 
 @tool("search_hotels")
+@cached_tool("search_hotels")
 def search_hotels(
     destination: str,
     check_in: str,
@@ -25,6 +28,8 @@ def search_hotels(
     Returns:
         JSON string with hotel options including pricing, location, and amenities
     """
+    place = get_destination_resolver().resolve(destination)
+
     if 'T' in check_in:
         arrival_dt = datetime.fromisoformat(check_in.split('+')[0].replace('Z', ''))
         check_in_date = arrival_dt.date().isoformat()
@@ -75,7 +80,8 @@ def search_hotels(
     
     return json.dumps({
         "hotels": affordable,
-        "destination": destination,
+        "destination": place.display_name if place else destination,
+        "destination_id": place.id if place else normalize(destination),
         "nights": nights,
         "early_arrival_detected": early_arrival,
         "check_in": check_in_date,
@@ -1,84 +1,65 @@
 from crewai_tools import tool
+from app.cache import cached_tool
+from app.destinations import get_destination_resolver, normalize
 import json
 from datetime import datetime
 
-@tool("search_hotels")
-def search_hotels(
-    destination: str,
-    check_in: str,
-    check_out: str,
-    budget_per_night: float,
-    preferences: str = "",
-    flight_arrival_time: str = ""
-) -> str:
+@tool("get_weather_forecast")
+@cached_tool("get_weather_forecast")
+def get_weather_forecast(destination: str, start_date: str, end_date: str) -> str:
     """
-    Search for hotel options in destination based on dates and budget.
-    
+    Get the weather forecast for a destination during the travel period.
+
     Args:
         destination: Target city/country
-        check_in: Check-in date (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)
-        check_out: Check-out date (YYYY-MM-DD)
-        budget_per_night: Maximum price per night in USD
-        preferences: User preferences for filtering hotels
-        flight_arrival_time: Optional arrival time to adjust check-in recommendations
-    
+        start_date: Trip start date (YYYY-MM-DD)
+        end_date: Trip end date (YYYY-MM-DD)
+
     Returns:
-        JSON string with hotel options including pricing, location, and amenities
+        JSON string with temperature range, conditions, precipitation chance and packing advice
     """
-    if 'T' in check_in:
-        arrival_dt = datetime.fromisoformat(check_in.split('+')[0].replace('Z', ''))
-        check_in_date = arrival_dt.date().isoformat()
-        early_arrival = arrival_dt.hour < 15
+    place = get_destination_resolver().resolve(destination)
+    latitude = place.latitude if place else 45.0
+    month = datetime.fromisoformat(start_date).month
+
+    # Seasons are flipped in the southern hemisphere
+    if latitude < 0:
+        month = (month + 5) % 12 + 1
+
+    mock_seasons = {
+        "winter": {"avg_temp_high": 45, "avg_temp_low": 37, "condition": "cold and rainy", "precipitation_chance": 0.4},
+        "spring": {"avg_temp_high": 62, "avg_temp_low": 46, "condition": "mild with showers", "precipitation_chance": 0.35},
+        "summer": {"avg_temp_high": 77, "avg_temp_low": 59, "condition": "warm and sunny", "precipitation_chance": 0.15},
+        "autumn": {"avg_temp_high": 60, "avg_temp_low": 47, "condition": "cool and cloudy", "precipitation_chance": 0.3}
+    }
+
+    if abs(latitude) < 23.5:
+        forecast = {"avg_temp_high": 88, "avg_temp_low": 75, "condition": "hot and humid", "precipitation_chance": 0.45}
+    elif month in (12, 1, 2):
+        forecast = dict(mock_seasons["winter"])
+    elif month in (3, 4, 5):
+        forecast = dict(mock_seasons["spring"])
+    elif month in (6, 7, 8):
+        forecast = dict(mock_seasons["summer"])
     else:
-        check_in_date = check_in
-        early_arrival = False
-    
-    nights = (datetime.fromisoformat(check_out) - datetime.fromisoformat(check_in_date)).days
-    
-    mock_hotels = [
-        {
-            "name": "Le Marais Boutique Hotel",
-            "location": "Le Marais District - Central Paris, walkable to museums",
-            "price_per_night": min(budget_per_night, 180),
-            "total_price": min(budget_per_night, 180) * nights,
-            "rating": 4.5,
-            "amenities": ["Free WiFi", "Breakfast included", "Walking distance to Louvre", "24/7 reception"],
-            "check_in_date": check_in_date,
-            "check_out_date": check_out,
-            "notes": "Early check-in available at no extra cost" if early_arrival else "Standard check-in from 3 PM"
-        },
-        {
-            "name": "Montmartre View Hotel",
-            "location": "Montmartre - Artistic district with panoramic views",
-            "price_per_night": min(budget_per_night * 0.7, 120),
-            "total_price": min(budget_per_night * 0.7, 120) * nights,
-            "rating": 4.2,
-            "amenities": ["Free WiFi", "Rooftop terrace", "Near Sacré-Cœur", "Metro access"],
-            "check_in_date": check_in_date,
-            "check_out_date": check_out,
-            "notes": "Budget-friendly option in charming neighborhood"
-        },
-        {
-            "name": "Latin Quarter Historic Inn",
-            "location": "Latin Quarter - Near Pantheon and Sorbonne",
-            "price_per_night": min(budget_per_night * 0.85, 150),
-            "total_price": min(budget_per_night * 0.85, 150) * nights,
-            "rating": 4.4,
-            "amenities": ["Free WiFi", "Continental breakfast", "Historic building", "Central location"],
-            "check_in_date": check_in_date,
-            "check_out_date": check_out,
-            "notes": "Perfect for exploring Left Bank cafes and bookshops"
-        }
-    ]
-    
-    affordable = [h for h in mock_hotels if h["price_per_night"] <= budget_per_night]
-    
+        forecast = dict(mock_seasons["autumn"])
+
+    recommendations = []
+    if forecast["avg_temp_low"] < 50:
+        recommendations.append("Pack warm layers and a jacket")
+    if forecast["precipitation_chance"] >= 0.3:
+        recommendations.append("Bring an umbrella or rain jacket")
+        recommendations.append("Plan indoor activities as backups")
+    if forecast["avg_temp_high"] > 70:
+        recommendations.append("Pack light clothing and sunscreen")
+
+    forecast["recommendations"] = recommendations
+
     return json.dumps({
-        "hotels": affordable,
-        "destination": destination,
-        "nights": nights,
-        "early_arrival_detected": early_arrival,
-        "check_in": check_in_date,
-        "check_out": check_out,
-        "total_options": len(affordable)
-    }, indent=2)
\ No newline at end of file
+        "destination": place.display_name if place else destination,
+        "destination_id": place.id if place else normalize(destination),
+        "start_date": start_date,
+        "end_date": end_date,
+        "forecast": forecast,
+        "prefer_indoor": forecast["precipitation_chance"] >= 0.3 or forecast["avg_temp_high"] < 50
+    }, indent=2)
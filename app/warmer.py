@@ -0,0 +1,204 @@
+from app.cache import get_cache
+from app.config import get_settings
+from app.hot_keys import HotKeyTracker
+from app.planner import build_travel_plan, plan_cache_key
+from app.schemas import TravelRequest
+from datetime import date
+from fastapi.concurrency import run_in_threadpool
+from functools import lru_cache
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Shared cache keys coordinating the warmers of every worker on the host
+LEADER_LEASE = "warmer:leader"
+JOB_TIMES_KEY = "warmer:job_times"
+WORKER_PREFIX = "warmer_worker:"
+WARMED_PREFIX = "warmer_warmed:"
+COUNTERS = "warmer"
+
+class CacheWarmer:
+    """
+    Precomputes whole plans for the hottest keys, which also fills the task store.
+
+    Every worker tracks its own traffic and publishes its hot keys and in-flight
+    request count to the shared cache. Only the worker holding the host-wide leader
+    lease warms: it merges the published hot keys, starts a job only while no worker
+    has interactive requests in flight, and never more than
+    warmer_max_jobs_per_minute across the host.
+    """
+
+    def __init__(self):
+        settings = get_settings()
+        self.settings = settings
+        self.tracker = HotKeyTracker(k=settings.warmer_top_k, decay_seconds=settings.warmer_decay_seconds)
+        self.owner = uuid.uuid4().hex
+        self.in_flight = 0
+        self.last_warmed: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, request: TravelRequest):
+        self.tracker.record(request)
+
+    def record_served(self, plan_key: str, hit: bool):
+        """Counts plan requests for keys the warmer filled, to report how often warming paid off"""
+        cache = get_cache()
+        if cache.peek(WARMED_PREFIX + plan_key) is None:
+            return
+        cache.increment(COUNTERS, "warmed_key_requests")
+        if hit:
+            cache.increment(COUNTERS, "warmed_key_hits")
+
+    def _publish(self):
+        get_cache().set(
+            WORKER_PREFIX + self.owner,
+            {
+                "pid": os.getpid(),
+                "in_flight": self.in_flight,
+                "hot_keys": [
+                    {"key": key, "count": count, "request": self.tracker.exemplars[key].model_dump(mode="json")}
+                    for key, count in self.tracker.hottest()
+                ]
+            },
+            ttl=3 * self.settings.warmer_interval_seconds
+        )
+
+    def _workers(self) -> List[dict]:
+        return list(get_cache().entries(WORKER_PREFIX).values())
+
+    @staticmethod
+    def _merge_hot_keys(workers: List[dict]) -> List[dict]:
+        """Sums each key's estimated requests across workers, hottest first"""
+        merged: Dict[str, dict] = {}
+        for worker in workers:
+            for entry in worker["hot_keys"]:
+                if entry["key"] in merged:
+                    merged[entry["key"]]["count"] += entry["count"]
+                else:
+                    merged[entry["key"]] = dict(entry)
+        return sorted(merged.values(), key=lambda entry: entry["count"], reverse=True)
+
+    def _rate_limited(self) -> bool:
+        now = time.time()
+        job_times = [t for t in get_cache().peek(JOB_TIMES_KEY, []) if now - t < 60]
+        return len(job_times) >= self.settings.warmer_max_jobs_per_minute
+
+    def _record_job(self):
+        cache = get_cache()
+        now = time.time()
+        job_times = [t for t in cache.peek(JOB_TIMES_KEY, []) if now - t < 60]
+        cache.set(JOB_TIMES_KEY, job_times + [now], ttl=60)
+        cache.increment(COUNTERS, "jobs")
+
+    def _next_request(self, hot_keys: List[dict]) -> Optional[TravelRequest]:
+        """The hottest request still worth a crew run: popular enough, not yet started, and not cached"""
+        cache = get_cache()
+        now = time.monotonic()
+        today = date.today()
+        for entry in hot_keys:
+            if entry["count"] < self.settings.warmer_min_count:
+                # Hot keys are sorted, so nothing after this one qualifies either
+                return None
+            if now - self.last_warmed.get(entry["key"], float("-inf")) < self.settings.warmer_rewarm_seconds:
+                continue
+            request = TravelRequest(**entry["request"])
+            if request.start_date <= today:
+                continue
+            if cache.peek(plan_cache_key(request)) is None:
+                return request
+        return None
+
+    def warm(self, request: TravelRequest):
+        """
+        Computes and stores the plan for one request, unless a worker already has.
+
+        Takes the same lease as get_or_compute(), so user requests for the key wait
+        for this run, but reads with peek() so warming never shows up as plan misses.
+        """
+        cache = get_cache()
+        key = plan_cache_key(request)
+        if cache.peek(key) is not None or not cache.acquire_lease(key, self.owner):
+            return
+        try:
+            if cache.peek(key) is not None:
+                return
+            plan = build_travel_plan(request)
+            if not plan["degraded_sections"]:
+                cache.set(key, plan, self.settings.plan_cache_ttl_seconds)
+                cache.set(WARMED_PREFIX + key, True, self.settings.plan_cache_ttl_seconds)
+        finally:
+            cache.release_lease(key, self.owner)
+
+    async def _run(self):
+        cache = get_cache()
+        while True:
+            await asyncio.sleep(self.settings.warmer_interval_seconds)
+            self._publish()
+            if not cache.acquire_lease(LEADER_LEASE, self.owner, seconds=3 * self.settings.warmer_interval_seconds):
+                continue
+
+            workers = self._workers()
+            if any(worker["in_flight"] > 0 for worker in workers) or self._rate_limited():
+                continue
+
+            request = self._next_request(self._merge_hot_keys(workers))
+            if request is None:
+                continue
+
+            key = self.tracker.key_for(request)
+            self._record_job()
+            self.last_warmed[key] = time.monotonic()
+            # Keep the leader lease while the plan runs, which can take longer than a tick
+            cache.acquire_lease(LEADER_LEASE, self.owner, seconds=self.settings.cache_lease_seconds)
+            try:
+                await run_in_threadpool(self.warm, request)
+                logger.info(f"Warmed plan for hot key {key}")
+            except Exception as e:
+                logger.warning(f"Cache warming failed for {key}: {str(e)}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        cache = get_cache()
+        cache.release_lease(LEADER_LEASE, self.owner)
+        cache.delete(WORKER_PREFIX + self.owner)
+
+    def stats(self) -> dict:
+        cache = get_cache()
+        workers = self._workers()
+        counters = cache.counters(COUNTERS).get(COUNTERS, {})
+        requests = counters.get("warmed_key_requests", 0)
+        return {
+            "enabled": self.settings.warmer_enabled,
+            "workers": len(workers),
+            "in_flight": sum(worker["in_flight"] for worker in workers),
+            "jobs_run": int(counters.get("jobs", 0)),
+            "warmed_key_requests": int(requests),
+            "warmed_key_hit_rate": round(counters.get("warmed_key_hits", 0) / requests, 4) if requests else 0.0,
+            "hot_keys": [
+                {
+                    "key": entry["key"],
+                    "estimated_requests": entry["count"],
+                    "warm": cache.peek(plan_cache_key(TravelRequest(**entry["request"]))) is not None
+                }
+                for entry in self._merge_hot_keys(workers)
+            ]
+        }
+
+@lru_cache()
+def get_cache_warmer() -> CacheWarmer:
+    return CacheWarmer()
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = os.getenv("TRAVEL_PLANNER_API_URL", "http://localhost:8000")
+CONNECT_TIMEOUT = float(os.getenv("TRAVEL_PLANNER_CONNECT_TIMEOUT", "5"))
+# Plans take several agent runs, so the read timeout is generous
+READ_TIMEOUT = float(os.getenv("TRAVEL_PLANNER_READ_TIMEOUT", "180"))
+PLAN_CACHE_TTL = int(os.getenv("TRAVEL_PLANNER_CACHE_TTL", "3600"))
+HISTORY_PATH = Path(os.getenv(
+    "TRAVEL_PLANNER_HISTORY_PATH",
+    str(Path.home() / ".ai_travel_planner" / "history.json")
+))
+HISTORY_LIMIT = 50
+
+
+class PlannerAPIError(Exception):
+    """Raised when the backend returns an error response"""
+
+
+class PlannerClient:
+    """HTTP client for the travel planner API with a pooled keep-alive session"""
+
+    def __init__(self, base_url: str = API_URL, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        # Only retry failed connections; a plan request may already be running on the backend
+        retries = Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.5)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, method: str, path: str, **kwargs) -> dict:
+        response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+        if response.status_code != 200:
+            raise PlannerAPIError(response.text)
+        return response.json()
+
+    def create_plan(self, payload: dict) -> dict:
+        return self._request("POST", "/api/plan", json=payload)
+
+    def replan(self, plan_id: str, changes: dict) -> dict:
+        return self._request("PATCH", f"/api/plan/{plan_id}", json=changes)
+
+    def autocomplete(self, query: str, limit: int = 8) -> List[dict]:
+        return self._request("GET", "/api/destinations/autocomplete", params={"q": query, "limit": limit})
+
+
+@st.cache_resource
+def get_client() -> PlannerClient:
+    # One client per Streamlit server process, so connections are reused across reruns and sessions
+    return PlannerClient()
+
+
+class _DegradedPlan(Exception):
+    """Carries a partial plan out of the memoized call, since st.cache_data never stores a raised result"""
+
+    def __init__(self, plan: dict):
+        super().__init__("plan is missing sections")
+        self.plan = plan
+
+
+@st.cache_data(ttl=PLAN_CACHE_TTL, show_spinner=False)
+def _fetch_complete_plan(payload: dict) -> dict:
+    plan = get_client().create_plan(payload)
+    if plan.get("degraded_sections"):
+        raise _DegradedPlan(plan)
+    return plan
+
+
+def fetch_plan(payload: dict) -> dict:
+    """Complete plans are memoized on the form inputs; partial plans and errors never are"""
+    try:
+        return _fetch_complete_plan(payload)
+    except _DegradedPlan as e:
+        return e.plan
+
+
+@st.cache_data(ttl=PLAN_CACHE_TTL, show_spinner=False)
+def _destination_labels(query: str) -> List[str]:
+    return [f"{match['name']}, {match['country']}" for match in get_client().autocomplete(query)]
+
+
+def search_destinations(query: str) -> List[str]:
+    """Destination suggestions for the form; an unreachable backend just means no suggestions"""
+    try:
+        return _destination_labels(query)
+    except (PlannerAPIError, requests.RequestException):
+        return []
+
+
+class PlanHistory:
+    """Past plans kept in a local JSON file so they can be reopened without calling the backend"""
+
+    def __init__(self, path: Path = HISTORY_PATH, limit: int = HISTORY_LIMIT):
+        self.path = path
+        self.limit = limit
+        self._lock = threading.Lock()
+
+    def _read(self) -> List[dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def _write(self, entries: List[dict]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a truncated history
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(temp_path, self.path)
+
+    def add(self, payload: dict, plan: dict) -> str:
+        entry_id = plan.get("plan_id") or uuid.uuid4().hex
+        entry = {
+            "id": entry_id,
+            "label": f"{payload['destination']} ({payload['start_date']} to {payload['end_date']})",
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "payload": payload,
+            "plan": plan
+        }
+        with self._lock:
+            entries = [e for e in self._read() if e["id"] != entry_id]
+            entries.insert(0, entry)
+            self._write(entries[:self.limit])
+        return entry_id
+
+    def entries(self) -> List[dict]:
+        with self._lock:
+            return self._read()
+
+    def get(self, entry_id: str) -> Optional[dict]:
+        for entry in self.entries():
+            if entry["id"] == entry_id:
+                return entry
+        return None
+
+
+@st.cache_resource
+def get_history() -> PlanHistory:
+    return PlanHistory()
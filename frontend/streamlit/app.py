@@ -1,6 +1,5 @@
 import streamlit as st
-import requests
-import json
+from api_client import PlannerAPIError, fetch_plan, get_client, get_history, search_destinations
 from datetime import date, timedelta
 
 # Page config
@@ -17,7 +16,10 @@ st.markdown("Plan your dream trip with our multi-agent AI crew.")
 # Sidebar for inputs
 with st.sidebar:
     st.header("Trip Details")
-    destination = st.text_input("Destination", "Paris, France")
+    query = st.text_input("Destination", "Paris, France")
+    # Close matches are offered, but whatever is picked here is what gets planned
+    suggestions = [label for label in search_destinations(query) if label != query] if len(query) >= 2 else []
+    destination = st.selectbox("Matching destinations", [query] + suggestions) if suggestions else query
     
     col1, col2 = st.columns(2)
     with col1:
@@ -34,30 +36,56 @@ with st.sidebar:
         ["Culture", "Food"]
     )
     
+    payload = {
+        "destination": destination,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "budget": budget,
+        "preferences": preferences,
+        "travelers": travelers
+    }
+    
     if st.button("Generate Plan", type="primary"):
         with st.spinner("AI Agents are working on your plan..."):
             try:
-                # Prepare payload
-                payload = {
-                    "destination": destination,
-                    "start_date": start_date.isoformat(),
-                    "end_date": end_date.isoformat(),
-                    "budget": budget,
-                    "preferences": preferences,
-                    "travelers": travelers
-                }
-                
-                # Call API
-                # Note: Assumes backend is running on localhost:8000
-                response = requests.post("http://localhost:8000/api/plan", json=payload)
-                
-                if response.status_code == 200:
-                    st.session_state.plan = response.json()
-                    st.success("Plan generated successfully!")
-                else:
-                    st.error(f"Error: {response.text}")
+                # Call API (memoized on the form inputs, so reruns don't re-send the request)
+                st.session_state.plan = fetch_plan(payload)
+                st.session_state.payload = payload
+                get_history().add(payload, st.session_state.plan)
+                st.success("Plan generated successfully!")
+            except PlannerAPIError as e:
+                st.error(f"Error: {str(e)}")
             except Exception as e:
                 st.error(f"Connection error: {str(e)}")
+    
+    # Only the changed fields are sent, so the backend re-runs just the agents that depend on them
+    current = st.session_state.get("plan")
+    if current and current.get("plan_id") and "payload" in st.session_state:
+        changes = {field: value for field, value in payload.items() if value != st.session_state.payload.get(field)}
+        if st.button("Update Plan", disabled=not changes, help="Re-plan the current trip with the changed fields"):
+            with st.spinner("Re-planning the affected parts of your trip..."):
+                try:
+                    st.session_state.plan = get_client().replan(current["plan_id"], changes)
+                    st.session_state.payload = payload
+                    get_history().add(payload, st.session_state.plan)
+                    replanned = st.session_state.plan.get("replanned_tasks") or ["nothing needed to re-run"]
+                    st.success(f"Plan updated. Re-ran: {', '.join(replanned)}")
+                except PlannerAPIError as e:
+                    st.error(f"Error: {str(e)}")
+                except Exception as e:
+                    st.error(f"Connection error: {str(e)}")
+    
+    # Past plans are stored locally and reopen without calling the backend
+    history = get_history().entries()
+    if history:
+        st.divider()
+        st.header("Past Plans")
+        labels = {entry["id"]: f"{entry['label']} - {entry['created_at']}" for entry in history}
+        selected = st.selectbox("Saved plans", list(labels), format_func=labels.get)
+        if st.button("Open Plan"):
+            entry = get_history().get(selected)
+            st.session_state.plan = entry["plan"]
+            st.session_state.payload = entry["payload"]
 
 # Display results
 if "plan" in st.session_state:
@@ -66,6 +94,8 @@ if "plan" in st.session_state:
     st.header(f"Trip to {plan.get('destination')}")
     st.subheader(f"Dates: {plan.get('dates')}")
     st.info(f"Total Estimated Cost: ${plan.get('total_estimated_cost'):,.2f}")
+    if plan.get("degraded_sections"):
+        st.warning(f"Not finished in time: {', '.join(plan['degraded_sections'])}. Generate the plan again to retry.")
     
     tab1, tab2, tab3, tab4 = st.tabs(["Flights", "Hotels", "Weather", "Attractions"])
     
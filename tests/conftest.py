@@ -0,0 +1,16 @@
+import pytest
+
+from app.cache import get_cache
+from app.config import get_settings
+
+
+@pytest.fixture
+def shared_cache(tmp_path, monkeypatch):
+    """Points get_cache() at a fresh database for the duration of a test"""
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setenv("CACHE_PATH", str(tmp_path / "shared.db"))
+    get_settings.cache_clear()
+    get_cache.cache_clear()
+    yield get_cache()
+    get_settings.cache_clear()
+    get_cache.cache_clear()
@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "frontend" / "streamlit"))
+
+import api_client
+from api_client import PlanHistory
+
+
+def make_payload(destination: str = "Paris") -> dict:
+    return {"destination": destination, "start_date": "2030-06-01", "end_date": "2030-06-05", "budget": 3000}
+
+
+def test_history_keeps_the_newest_entries_up_to_the_limit(tmp_path):
+    history = PlanHistory(tmp_path / "history.json", limit=3)
+    for i in range(5):
+        history.add(make_payload(f"City {i}"), {"plan_id": f"plan-{i}"})
+    assert [entry["id"] for entry in history.entries()] == ["plan-4", "plan-3", "plan-2"]
+
+
+def test_history_replaces_an_entry_with_the_same_id(tmp_path):
+    history = PlanHistory(tmp_path / "history.json")
+    history.add(make_payload("Paris"), {"plan_id": "plan-1", "total_estimated_cost": 2000})
+    history.add(make_payload("Rome"), {"plan_id": "plan-2"})
+    history.add(make_payload("Paris"), {"plan_id": "plan-1", "total_estimated_cost": 1800})
+
+    assert [entry["id"] for entry in history.entries()] == ["plan-1", "plan-2"]
+    assert history.get("plan-1")["plan"]["total_estimated_cost"] == 1800
+
+
+def test_corrupt_history_reads_as_empty(tmp_path):
+    path = tmp_path / "history.json"
+    path.write_text("[{\"id\": ", encoding="utf-8")
+    history = PlanHistory(path)
+    assert history.entries() == []
+
+    history.add(make_payload(), {"plan_id": "plan-1"})
+    assert [entry["id"] for entry in history.entries()] == ["plan-1"]
+
+
+class FakeClient:
+    def __init__(self, plans):
+        self.plans = list(plans)
+        self.calls = 0
+
+    def create_plan(self, payload: dict) -> dict:
+        self.calls += 1
+        return self.plans.pop(0)
+
+
+def test_degraded_plans_are_not_memoized(monkeypatch):
+    client = FakeClient([
+        {"plan_id": "plan-1", "degraded_sections": ["weather"]},
+        {"plan_id": "plan-2", "degraded_sections": []},
+    ])
+    monkeypatch.setattr(api_client, "get_client", lambda: client)
+    api_client._fetch_complete_plan.clear()
+
+    payload = make_payload()
+    assert api_client.fetch_plan(payload)["plan_id"] == "plan-1"
+    assert api_client.fetch_plan(payload)["plan_id"] == "plan-2"
+    # The complete plan is memoized, so the backend is not called again
+    assert api_client.fetch_plan(payload)["plan_id"] == "plan-2"
+    assert client.calls == 2
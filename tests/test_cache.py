@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.cache import SharedCache, cached_tool
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SharedCache(str(tmp_path / "cache.db"), default_ttl=60, lease_seconds=5)
+
+
+def test_get_or_compute_skips_values_rejected_by_should_store(cache):
+    partial = {"degraded_sections": ["weather"]}
+    complete = {"degraded_sections": []}
+
+    def not_degraded(plan):
+        return not plan["degraded_sections"]
+
+    assert cache.get_or_compute("plan:a", lambda: partial, should_store=not_degraded) == partial
+    assert cache.get("plan:a") is None
+
+    assert cache.get_or_compute("plan:a", lambda: complete, should_store=not_degraded) == complete
+    assert cache.get("plan:a") == complete
+
+
+def test_cached_tool_keys_origin_and_destination_by_city(shared_cache):
+    calls = []
+
+    @cached_tool("search_flights")
+    def search(destination: str, start_date: str, end_date: str, budget: float, origin: str = "") -> str:
+        calls.append((origin, destination))
+        return f"{origin}->{destination}"
+
+    assert search("Rome", "2024-06-05", "", 300, origin="Paris, France") == "Paris, France->Rome"
+    assert search("rome", "2024-06-05", "", 300, origin="paris") == "Paris, France->Rome"
+    assert search("Rome", "2024-06-05", "", 300, origin="Barcelona") == "Barcelona->Rome"
+    assert search("Rome", "2024-06-05", "", 300) == "->Rome"
+    assert len(calls) == 3
+
+
+def _compute_once(path: str, key: str, results):
+    cache = SharedCache(path, default_ttl=60, lease_seconds=30)
+
+    def compute():
+        cache.increment("test", "computes")
+        time.sleep(0.5)
+        return {"computed_by": os.getpid()}
+
+    results.put(cache.get_or_compute(key, compute, poll_interval=0.05))
+
+
+def test_get_or_compute_runs_once_across_threads(cache):
+    computes = []
+
+    def compute():
+        computes.append(threading.get_ident())
+        time.sleep(0.3)
+        return "value"
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: cache.get_or_compute("tool:a", compute, poll_interval=0.02), range(8)))
+
+    assert results == ["value"] * 8
+    assert len(computes) == 1
+    assert cache.stats()["tool"] == {"hits": 7, "misses": 1, "hit_rate": 0.875}
+
+
+def test_get_or_compute_runs_once_across_processes(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SharedCache(path)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=_compute_once, args=(path, "plan:a", results)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    values = [results.get(timeout=60) for _ in processes]
+    for process in processes:
+        process.join(timeout=60)
+
+    assert len({value["computed_by"] for value in values}) == 1
+    assert SharedCache(path).counters("test") == {"test": {"computes": 1}}
+
+
+def test_get_or_compute_takes_over_an_abandoned_lease(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.db"), lease_seconds=0.3)
+    assert cache.acquire_lease("plan:a", "crashed-worker")
+
+    started = time.monotonic()
+    assert cache.get_or_compute("plan:a", lambda: "value", poll_interval=0.05) == "value"
+    assert time.monotonic() - started >= 0.3
+
+
+def test_set_purges_expired_entries(cache):
+    cache.purge_interval = 0
+    cache.set("tool:old", "stale", ttl=-1)
+    cache.set("tool:new", "fresh")
+
+    keys = [row[0] for row in cache._connect().execute("SELECT key FROM entries")]
+    assert keys == ["tool:new"]
+
+
+def test_lease_can_be_renewed_only_by_its_owner(cache):
+    assert cache.acquire_lease("warmer:leader", "a", seconds=60)
+    assert not cache.acquire_lease("warmer:leader", "b", seconds=60)
+    assert cache.acquire_lease("warmer:leader", "a", seconds=60)
+    cache.release_lease("warmer:leader", "a")
+    assert cache.acquire_lease("warmer:leader", "b", seconds=60)
@@ -0,0 +1,70 @@
+import json
+
+from app.agents.context_compaction import compact_flight_output, compact_handoff, compact_weather_output
+
+
+def test_flight_output_keeps_arrivals_and_prices_from_json():
+    raw = """Here are my picks:
+    {"recommended_flights": [
+        {"airline": "Air France", "flight_number": "AF123", "departure_time": "2024-06-01T08:00:00",
+         "arrival_time": "2024-06-01T14:30:00", "price": "$450", "reasoning": "Arrives before check-in"},
+        {"airline": "Delta", "flight_number": "DL456", "departure_time": "2024-06-01T18:00:00",
+         "arrival_time": "2024-06-02T07:15:00", "price": 380.0}
+    ]}"""
+    assert compact_flight_output(raw) == {"recommended_flights": [
+        {"airline": "Air France", "flight_number": "AF123", "arrival_time": "2024-06-01T14:30:00", "price": 450.0},
+        {"airline": "Delta", "flight_number": "DL456", "arrival_time": "2024-06-02T07:15:00", "price": 380.0},
+    ]}
+
+
+
+def test_flight_output_prefers_the_recommendation_over_echoed_tool_results():
+    tool_result = {"flights": [
+        {"airline": "Ryanair", "flight_number": "FR1", "arrival_time": "2024-06-01T06:00:00", "price": 90},
+        {"airline": "easyJet", "flight_number": "U21", "arrival_time": "2024-06-01T07:00:00", "price": 95},
+        {"airline": "Air France", "flight_number": "AF123", "arrival_time": "2024-06-01T14:30:00", "price": 450},
+    ]}
+    recommendation = {"recommended_flights": [
+        {"airline": "Air France", "flight_number": "AF123", "arrival_time": "2024-06-01T14:30:00", "price": 450},
+    ]}
+    raw = f"Tool returned: {json.dumps(tool_result)}\nMy pick: {json.dumps(recommendation)}"
+    assert compact_flight_output(raw) == {"recommended_flights": [
+        {"airline": "Air France", "flight_number": "AF123", "arrival_time": "2024-06-01T14:30:00", "price": 450.0},
+    ]}
+
+def test_flight_fallback_only_reads_labelled_arrivals():
+    raw = (
+        "Option 1: departs 2024-06-01T08:00, arrives 2024-06-01T14:30 for $450\n"
+        "Option 2: departs 2024-06-01T18:00 and lands the next morning, $380\n"
+    )
+    assert compact_flight_output(raw) == {"recommended_flights": [
+        {"arrival_time": "2024-06-01T14:30", "price": 450.0},
+    ]}
+
+
+def test_flight_fallback_ignores_unlabelled_timestamps():
+    raw = "Best option departs 2024-06-01T08:00 for $450. Arrival after departing 2024-06-01T09:00."
+    assert compact_flight_output(raw) == {}
+    assert compact_handoff("flight", raw, ["hotel"]) == raw
+
+
+def test_weather_output_from_prose():
+    raw = "Expect mostly rainy days with a precipitation chance of 70% throughout the stay."
+    assert compact_weather_output(raw) == {"precipitation_chance": 0.7, "condition": "rainy"}
+
+
+def test_handoff_is_smaller_than_the_full_output():
+    raw = json.dumps({
+        "forecast": {"condition": "sunny", "precipitation_chance": 0.1, "prefer_indoor": False},
+        "recommendations": ["Pack sunscreen", "Bring a light jacket for the evenings"] * 5,
+    })
+    compacted = compact_handoff("weather", raw, ["attractions"])
+    assert compacted.startswith("Weather summary: ")
+    assert json.loads(compacted.split(": ", 1)[1]) == {
+        "condition": "sunny", "precipitation_chance": 0.1, "prefer_indoor": False
+    }
+    assert len(compacted) < len(raw)
+
+
+def test_tasks_without_a_compactor_pass_through():
+    assert compact_handoff("hotel", "full hotel output", []) == "full hotel output"
@@ -0,0 +1,54 @@
+import pytest
+
+from app.destinations import canonical_destination_id, get_destination_resolver, normalize
+
+
+@pytest.fixture(scope="module")
+def resolver():
+    return get_destination_resolver()
+
+
+@pytest.mark.parametrize("query, city_id", [
+    ("Paris", "paris"),
+    ("paris, france", "paris"),
+    ("Paris France", "paris"),
+    ("NYC", "new-york"),
+    ("New York, USA", "new-york"),
+    ("London, England", "london"),
+    ("Zürich", "zurich"),
+    ("München", "munich"),
+])
+def test_resolves_exact_names_and_aliases(resolver, query, city_id):
+    assert resolver.resolve(query).id == city_id
+
+
+@pytest.mark.parametrize("query", ["Bern", "Nice", "York", "York, UK", "Paris, Texas", "new yrok"])
+def test_near_misses_do_not_resolve(resolver, query):
+    assert resolver.resolve(query) is None
+
+
+@pytest.mark.parametrize("query, wrong_id", [
+    ("Bern", "berlin"),
+    ("Nice", "venice"),
+    ("York", "new-york"),
+    ("York, UK", "new-york"),
+    ("Paris, Texas", "paris"),
+])
+def test_near_misses_get_their_own_cache_id(query, wrong_id):
+    assert canonical_destination_id(query) != wrong_id
+
+
+def test_fuzzy_and_prefix_matches_are_still_suggested(resolver):
+    assert "new-york" in [d.id for d in resolver.suggest("new yrok")]
+    assert "berlin" in [d.id for d in resolver.autocomplete("ber")]
+
+
+def test_unicode_destinations_keep_distinct_ids():
+    ids = [canonical_destination_id(name) for name in ["東京", "Москва", "القاهرة"]]
+    assert all(ids)
+    assert len(set(ids)) == 3
+
+
+def test_normalize_folds_latin_accents_only():
+    assert normalize("  São-Paulo! ") == "sao paulo"
+    assert normalize("МОСКВА") == "москва"
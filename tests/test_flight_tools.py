@@ -0,0 +1,61 @@
+import json
+from datetime import date
+
+import pytest
+
+pytest.importorskip("crewai_tools")
+
+from app.tools.flight_tools import MAX_FLEX_DAYS, _fare_calendar, search_flexible_flights, search_flights
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(shared_cache):
+    return shared_cache
+
+
+def flexible(**kwargs):
+    arguments = {"destination": "Paris", "start_date": "2026-06-10", "end_date": "2026-06-17", **kwargs}
+    return json.loads(search_flexible_flights.run(**arguments))
+
+
+def test_matrix_holds_round_trip_fares_from_the_calendar():
+    result = flexible(flex_days=2)
+    outbound, inbound = _fare_calendar("paris", 2026)
+    first_departure = (date(2026, 6, 8) - date(2026, 1, 1)).days
+    assert result["departure_dates"][0] == "2026-06-08"
+    assert result["price_matrix"][0][0] == round(float(outbound[first_departure] + inbound[first_departure + 7]), 2)
+
+
+def test_cheapest_combinations_are_sorted_and_within_budget():
+    result = flexible(flex_days=3, budget=400, top_k=4)
+    prices = [combination["total_price"] for combination in result["cheapest_combinations"]]
+    assert prices == sorted(prices)
+    assert all(price <= 400 for price in prices)
+
+
+@pytest.mark.parametrize("flex_days, expected_dates", [(-3, 1), (0, 1), (MAX_FLEX_DAYS + 100, 2 * MAX_FLEX_DAYS + 1)])
+def test_flex_days_is_clamped(flex_days, expected_dates):
+    result = flexible(flex_days=flex_days)
+    assert len(result["departure_dates"]) == expected_dates
+    assert len(result["cheapest_combinations"]) >= 1
+
+
+def test_search_flights_agrees_with_the_flexible_search():
+    cheapest = flexible(flex_days=3)["cheapest_combinations"][0]
+    flights = json.loads(search_flights.run(
+        destination="Paris",
+        start_date=cheapest["departure_date"],
+        end_date=cheapest["return_date"],
+        budget=5000
+    ))["flights"]
+    assert min(flight["price"] for flight in flights) == cheapest["total_price"]
+
+
+def test_any_future_date_is_priced():
+    result = flexible(start_date="2031-12-28", end_date="2032-01-04")
+    assert result["departure_dates"][-1] == "2031-12-31"
+    assert result["return_dates"][-1] == "2032-01-07"
+    assert result["requested_dates_price"] > 0
+
+    flights = json.loads(search_flights.run(destination="Rome", start_date="2031-12-30", end_date="", budget=5000, origin="Paris"))
+    assert flights["flights"]
@@ -0,0 +1,67 @@
+from datetime import date
+
+from app.hot_keys import CountMinSketch, HotKeyTracker
+from app.schemas import TravelRequest
+
+
+def make_request(destination: str, start_day: int = 1) -> TravelRequest:
+    return TravelRequest(
+        destination=destination,
+        start_date=date(2024, 6, start_day),
+        end_date=date(2024, 6, start_day + 4),
+        budget=3000
+    )
+
+
+def test_sketch_never_undercounts():
+    sketch = CountMinSketch(width=64, depth=4)
+    counts = {f"key-{i}": i % 7 + 1 for i in range(200)}
+    for key, count in counts.items():
+        sketch.add(key, count)
+    assert all(sketch.estimate(key) >= count for key, count in counts.items())
+
+
+def test_sketch_decay_halves_counts():
+    sketch = CountMinSketch()
+    assert sketch.add("paris", 9) == 9
+    sketch.decay()
+    assert sketch.estimate("paris") == 4
+
+
+def test_tracker_keys_requests_by_canonical_city_and_dates():
+    assert HotKeyTracker.key_for(make_request("Paris, France")) == HotKeyTracker.key_for(make_request("paris"))
+    assert HotKeyTracker.key_for(make_request("Paris")) != HotKeyTracker.key_for(make_request("Paris", start_day=2))
+
+
+def test_tracker_keeps_the_top_k():
+    tracker = HotKeyTracker(k=2)
+    for destination, requests in [("Paris", 5), ("Rome", 3), ("Tokyo", 1), ("Lisbon", 4)]:
+        for _ in range(requests):
+            tracker.record(make_request(destination))
+
+    hottest = tracker.hottest()
+    assert [key.split("|")[0] for key, _ in hottest] == ["paris", "lisbon"]
+    assert [count for _, count in hottest] == [5, 4]
+    assert set(tracker.exemplars) == {key for key, _ in hottest}
+
+
+def test_tracker_decay_lets_new_trends_take_over():
+    tracker = HotKeyTracker(k=1, decay_seconds=3600)
+    for _ in range(4):
+        tracker.record(make_request("Paris"))
+
+    # An hour later Paris's count halves to 2, and Rome overtakes it on its third request
+    tracker._last_decay -= 3601
+    for _ in range(3):
+        tracker.record(make_request("Rome"))
+    assert tracker.hottest()[0] == (HotKeyTracker.key_for(make_request("Rome")), 3)
+
+
+def test_keys_decayed_to_zero_are_dropped():
+    tracker = HotKeyTracker(k=5, decay_seconds=3600)
+    tracker.record(make_request("Paris"))
+
+    tracker._last_decay -= 3601
+    tracker.record(make_request("Rome"))
+    assert [key.split("|")[0] for key, _ in tracker.hottest()] == ["rome"]
+    assert list(tracker.exemplars) == [HotKeyTracker.key_for(make_request("Rome"))]
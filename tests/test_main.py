@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip("crewai")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+@pytest.fixture
+def client(shared_cache, monkeypatch):
+    record = {
+        "request": {
+            "destination": "Paris",
+            "start_date": "2030-06-01",
+            "end_date": "2030-06-05",
+            "budget": 3000,
+            "preferences": ["food"]
+        },
+        "provided_outputs": {},
+        "task_outputs": {}
+    }
+    monkeypatch.setattr(main, "load_plan_record", lambda plan_id: record if plan_id == "abc" else None)
+    monkeypatch.setattr(main, "build_travel_plan", lambda *args, **kwargs: pytest.fail("should not plan"))
+    # Not used as a context manager, so the startup events (and the cache warmer) don't run
+    return TestClient(main.app)
+
+
+def test_patch_with_invalid_merged_request_returns_422(client):
+    response = client.patch("/api/plan/abc", json={"preferences": None})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["preferences"]
+
+
+def test_patch_unknown_plan_returns_404(client):
+    assert client.patch("/api/plan/missing", json={"budget": 4000}).status_code == 404
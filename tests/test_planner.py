@@ -0,0 +1,141 @@
+import json
+import time
+from datetime import date
+
+import pytest
+
+pytest.importorskip("crewai")
+
+from app import planner
+from app.schemas import MultiLegTravelRequest, TravelRequest
+
+
+def make_request(**fields) -> TravelRequest:
+    return TravelRequest(**{
+        "destination": "Paris",
+        "start_date": date(2030, 6, 1),
+        "end_date": date(2030, 6, 5),
+        "budget": 3000,
+        "preferences": ["food"],
+        **fields
+    })
+
+
+class FakeCrew:
+    """Runs the pending tasks in order, calling back like CrewAI's task callbacks do"""
+
+    seconds_per_task = 0.0
+
+    def __init__(self, reuse_outputs, on_task_output, **_):
+        self.pending = [name for name in planner.TASK_ORDER if name not in reuse_outputs]
+        self.on_task_output = on_task_output
+        self.started = []
+
+    def kickoff(self):
+        for name in self.pending:
+            self.started.append(name)
+            time.sleep(self.seconds_per_task)
+            self.on_task_output(name, f"{name} output")
+
+
+@pytest.fixture
+def crews(shared_cache, monkeypatch):
+    created = []
+
+    def create_crew(**kwargs):
+        created.append(FakeCrew(**kwargs))
+        return created[-1]
+
+    monkeypatch.setattr(planner, "create_travel_planning_crew", create_crew)
+    return created
+
+
+def test_crew_stops_after_the_deadline(crews, monkeypatch):
+    monkeypatch.setattr(FakeCrew, "seconds_per_task", 0.15)
+
+    plan = planner.build_travel_plan(make_request(), deadline=time.monotonic() + 0.2)
+    assert plan["degraded_sections"] == ["weather", "hotel", "attractions"]
+
+    # The weather task was already running at the deadline; nothing starts after it
+    time.sleep(0.5)
+    assert crews[0].started == ["flight", "weather"]
+
+
+def test_plan_record_outputs_are_used_after_the_task_store_expires(crews, shared_cache):
+    first = planner.build_travel_plan(make_request())
+    assert first["replanned_tasks"] == planner.TASK_ORDER
+
+    shared_cache._connect().execute("DELETE FROM entries WHERE key LIKE 'task:%'")
+    record = planner.load_plan_record(first["plan_id"])
+    replanned = planner.build_travel_plan(
+        make_request(preferences=["museums"]),
+        stored_outputs=record["task_outputs"]
+    )
+    assert replanned["replanned_tasks"] == ["hotel", "attractions"]
+    assert crews[-1].pending == ["hotel", "attractions"]
+
+
+def multi_leg_request(budget=1000) -> MultiLegTravelRequest:
+    return MultiLegTravelRequest(
+        legs=[
+            {"destination": "Paris", "start_date": "2030-06-01", "end_date": "2030-06-04"},
+            {"destination": "Rome", "start_date": "2030-06-04", "end_date": "2030-06-07"},
+            {"destination": "Barcelona", "start_date": "2030-06-07", "end_date": "2030-06-10"},
+        ],
+        budget=budget
+    )
+
+
+def test_leg_budgets_add_up_to_the_total():
+    budgets = planner.allocate_leg_budgets(multi_leg_request())
+    assert budgets == [333.33, 333.33, 333.34]
+    assert sum(budgets) == pytest.approx(1000)
+
+
+def leg_plan(request: TravelRequest, high: int, low: int, degraded=()) -> dict:
+    return {
+        "destination": request.destination,
+        "flights": [{"airline": f"To {request.destination}", "flight_number": "X1", "departure_time": "08:00",
+                     "arrival_time": "10:00", "duration_hours": 2, "price": 100, "booking_class": "Economy"}],
+        "hotels": [],
+        "weather": {"avg_temp_high": high, "avg_temp_low": low, "condition": "mild",
+                    "precipitation_chance": high / 100, "recommendations": ["Pack layers"]},
+        "attractions": [],
+        "total_estimated_cost": 300,
+        "reasoning_summary": f"{request.destination} plan",
+        "replanned_tasks": ["hotel"],
+        "degraded_sections": list(degraded),
+    }
+
+
+def test_multi_leg_plan_searches_transfers_and_merges_legs(shared_cache, monkeypatch):
+    searches = []
+
+    class FakeSearch:
+        @staticmethod
+        def run(**kwargs):
+            searches.append(kwargs)
+            return json.dumps({"flights": [
+                {"airline": "Vueling", "flight_number": "VY1", "departure_time": "09:00", "arrival_time": "11:00",
+                 "duration_hours": 2, "price": 90, "booking_class": "Economy"},
+            ]})
+
+    def fake_build(request, provided_outputs=None, deadline=None):
+        weather = {"Paris": (70, 55), "Rome": (85, 65), "Barcelona": (80, 60)}[request.destination]
+        return leg_plan(request, *weather, degraded=["weather"] if request.destination == "Rome" else [])
+
+    monkeypatch.setattr(planner, "search_flights", FakeSearch)
+    monkeypatch.setattr(planner, "build_travel_plan", fake_build)
+    plan = planner.build_multi_leg_plan(multi_leg_request())
+
+    assert sorted((s["origin"], s["destination"], s["start_date"], s["end_date"]) for s in searches) == [
+        ("Paris", "Rome", "2030-06-04", ""),
+        ("Rome", "Barcelona", "2030-06-07", ""),
+    ]
+    assert [flight["airline"] for flight in plan["flights"]] == ["To Paris", "Vueling", "Vueling"]
+    assert plan["flights"][1]["notes"].startswith("Transfer from Paris to Rome")
+    assert plan["weather"]["avg_temp_high"] == 85
+    assert plan["weather"]["avg_temp_low"] == 55
+    assert plan["weather"]["recommendations"] == ["Pack layers"]
+    assert plan["degraded_sections"] == ["leg2:weather"]
+    assert plan["replanned_tasks"] == ["leg1:hotel", "leg2:hotel", "leg3:hotel"]
@@ -0,0 +1,26 @@
+import pytest
+from pydantic import ValidationError
+
+from app.schemas import MultiLegTravelRequest
+
+
+def legs(*dates):
+    return [
+        {"destination": destination, "start_date": start, "end_date": end}
+        for destination, (start, end) in zip(["Paris", "Rome", "Barcelona"], dates)
+    ]
+
+
+def test_back_to_back_legs_are_valid():
+    request = MultiLegTravelRequest(legs=legs(("2030-06-01", "2030-06-04"), ("2030-06-04", "2030-06-08")), budget=3000)
+    assert len(request.legs) == 2
+
+
+def test_overlapping_legs_are_rejected():
+    with pytest.raises(ValidationError, match="starts before the leg to Paris ends"):
+        MultiLegTravelRequest(legs=legs(("2030-06-01", "2030-06-05"), ("2030-06-04", "2030-06-08")), budget=3000)
+
+
+def test_leg_ending_before_it_starts_is_rejected():
+    with pytest.raises(ValidationError, match="ends before it starts"):
+        MultiLegTravelRequest(legs=legs(("2030-06-05", "2030-06-01")), budget=3000)
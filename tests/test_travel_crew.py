@@ -0,0 +1,80 @@
+import pytest
+
+pytest.importorskip("crewai")
+
+from app.agents.travel_crew import (
+    AGENT_STOPPED_MARKER,
+    MIN_FLEX_FLIGHT_ITERATIONS,
+    MIN_TASK_ITERATIONS,
+    TASK_ORDER,
+    TASK_TIME_WEIGHTS,
+    build_task_inputs,
+    is_stopped_output,
+    split_task_budgets,
+    task_output_keys,
+)
+
+
+def keys_for(budget=3000, preferences=("food",), destination="Paris", provided_outputs=None):
+    inputs = build_task_inputs(destination, "2030-06-01", "2030-06-05", budget, list(preferences))
+    return task_output_keys(inputs, provided_outputs)
+
+
+def changed(before: dict, after: dict) -> list:
+    return [name for name in before if before[name] != after[name]]
+
+
+def test_preferences_change_only_hotel_and_attractions():
+    assert changed(keys_for(), keys_for(preferences=("museums",))) == ["hotel", "attractions"]
+
+
+def test_budget_change_leaves_weather_alone():
+    assert changed(keys_for(), keys_for(budget=4000)) == ["flight", "hotel", "attractions"]
+
+
+def test_destination_spellings_share_keys():
+    assert keys_for(destination="Paris, France") == keys_for(destination="paris")
+
+
+def test_provided_output_is_keyed_apart_from_a_crew_run():
+    keys = keys_for()
+    provided = keys_for(provided_outputs={"flight": "Transfer from Rome"})
+    # Downstream of the flight, the hotel key follows it; weather and attractions don't depend on it
+    assert changed(keys, provided) == ["flight", "hotel"]
+
+
+def test_weights_cover_the_whole_deadline():
+    assert sum(TASK_TIME_WEIGHTS.values()) == pytest.approx(1)
+    budgets = split_task_budgets(TASK_ORDER, 60, 2.5)
+    assert sum(budget["seconds"] for budget in budgets.values()) == pytest.approx(60, abs=0.05)
+
+
+def test_time_left_is_split_among_the_tasks_that_run():
+    budgets = split_task_budgets(["hotel", "attractions"], 30, 2.5)
+    assert budgets == {"hotel": {"seconds": 15.0, "max_iter": 6}, "attractions": {"seconds": 15.0, "max_iter": 6}}
+
+
+def test_default_deadline_gives_every_agent_room_for_a_tool_call():
+    budgets = split_task_budgets(TASK_ORDER, 30, 2.5)
+    assert all(budget["max_iter"] >= MIN_TASK_ITERATIONS for budget in budgets.values())
+    assert budgets["weather"]["max_iter"] == 2
+
+
+@pytest.mark.parametrize("seconds", [3, 0, -5])
+def test_iterations_are_floored_when_time_is_short(seconds):
+    budgets = split_task_budgets(TASK_ORDER, seconds, 2.5)
+    assert {name: budget["max_iter"] for name, budget in budgets.items()} == dict.fromkeys(TASK_ORDER, MIN_TASK_ITERATIONS)
+    # Time budgets cover the floored iterations rather than going to zero
+    assert all(budget["seconds"] == MIN_TASK_ITERATIONS * 2.5 for budget in budgets.values())
+
+
+def test_flexible_flight_search_gets_an_extra_iteration():
+    budgets = split_task_budgets(TASK_ORDER, 3, 2.5, date_flexibility_days=3)
+    assert budgets["flight"]["max_iter"] == MIN_FLEX_FLIGHT_ITERATIONS
+    assert budgets["weather"]["max_iter"] == MIN_TASK_ITERATIONS
+
+
+def test_stopped_output_is_detected():
+    assert is_stopped_output(f"Partial notes. {AGENT_STOPPED_MARKER}.")
+    assert not is_stopped_output("Final answer: take the morning flight")
+    assert not is_stopped_output(None)
@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("crewai")
+
+import app.warmer
+from app.cache import get_cache
+from app.planner import plan_cache_key
+from app.schemas import TravelRequest
+from app.warmer import CacheWarmer
+
+
+def hot_key(destination: str, count: int, start_in_days: int = 30) -> dict:
+    start = date.today() + timedelta(days=start_in_days)
+    return {
+        "key": f"{destination}|{start}",
+        "count": count,
+        "request": {
+            "destination": destination,
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=4)).isoformat(),
+            "budget": 3000
+        }
+    }
+
+
+@pytest.fixture
+def warmer(shared_cache, monkeypatch):
+    monkeypatch.setenv("WARMER_MIN_COUNT", "3")
+    return CacheWarmer()
+
+
+def test_keys_below_the_minimum_count_are_not_warmed(warmer):
+    assert warmer._next_request([hot_key("Paris", 2)]) is None
+    assert warmer._next_request([hot_key("Paris", 3)]).destination == "Paris"
+
+
+def test_trips_that_already_started_are_not_warmed(warmer):
+    request = warmer._next_request([hot_key("Paris", 9, start_in_days=-1), hot_key("Rome", 5)])
+    assert request.destination == "Rome"
+
+
+def test_hot_keys_are_summed_across_workers():
+    merged = CacheWarmer._merge_hot_keys([
+        {"hot_keys": [hot_key("Paris", 2), hot_key("Rome", 1)]},
+        {"hot_keys": [hot_key("Paris", 2)]},
+    ])
+    assert [(entry["request"]["destination"], entry["count"]) for entry in merged] == [("Paris", 4), ("Rome", 1)]
+
+
+def test_warming_is_not_counted_as_a_plan_miss(warmer, monkeypatch):
+    runs = []
+
+    def fake_build(request):
+        runs.append(request)
+        return {"destination": request.destination, "degraded_sections": []}
+
+    monkeypatch.setattr(app.warmer, "build_travel_plan", fake_build)
+    request = TravelRequest(**hot_key("Paris", 3)["request"])
+    warmer.warm(request)
+    warmer.warm(request)
+
+    cache = get_cache()
+    assert len(runs) == 1
+    assert cache.peek(plan_cache_key(request))["destination"] == "Paris"
+    assert "plan" not in cache.stats()